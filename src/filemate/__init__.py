@@ -1,7 +1,13 @@
-# Dynamically load the version from pyproject.toml using importlib.metadata
-from importlib.metadata import version, PackageNotFoundError
+# Version is resolved lazily (PEP 562) so importing the package does not
+# pay the importlib.metadata dist-info scan on every interpreter start.
+def __getattr__(name: str) -> str:
+    if name == "__version__":
+        from importlib.metadata import version, PackageNotFoundError
 
-try:
-    __version__ = version("file-mate")  # Must match [project.name] in pyproject.toml
-except PackageNotFoundError:
-    __version__ = "0.0.0-dev"  # Fallback when not installed (e.g. in dev mode)
+        try:
+            v = version("file-mate")  # Must match [project.name] in pyproject.toml
+        except PackageNotFoundError:
+            v = "0.0.0-dev"  # Fallback when not installed (e.g. in dev mode)
+        globals()["__version__"] = v  # Cache so later reads skip this hook
+        return v
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,14 +1,23 @@
-# ruff: noqa: F401 --> To remove unused import warnings for whole file
-
-# Import commands here to ensure they are registered with the CLI
-from filemate.commands import rename
-from filemate.commands import change_extension
-
-# Import the group commands
+# Import the group commands (subcommands are loaded lazily by the group itself)
 from filemate.commands.file_group import file
 
 import rich_click as click
-from filemate import __version__  # Import version defined in __init__.py
+
+
+def _show_version(ctx: click.Context, param: click.Parameter, value: bool) -> None:
+    """Print the version and exit (eager --version callback).
+
+    Resolves through filemate.__version__ so the metadata lookup still only
+    happens when --version is used, and the package's 0.0.0-dev fallback
+    applies when the distribution is not installed — click's package_name
+    lookup raises RuntimeError in that case.
+    """
+    if not value or ctx.resilient_parsing:
+        return
+    import filemate
+
+    click.echo(f"{ctx.find_root().info_name} version {filemate.__version__}")
+    ctx.exit()
 
 
 @click.group(
@@ -17,11 +26,14 @@ from filemate import __version__  # Import version defined in __init__.py
         auto_envvar_prefix="FILEMATE",
     )
 )
-@click.version_option(
-    __version__,  # Dynamically pull version string
+@click.option(
     "--version",
     "-v",
-    message="%(prog)s version %(version)s",
+    is_flag=True,
+    expose_value=False,
+    is_eager=True,
+    callback=_show_version,
+    help="Show the version and exit.",
 )
 def cli() -> None:
     """FileMate: Your CLI tool for file operations."""
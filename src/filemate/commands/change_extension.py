@@ -2,8 +2,6 @@ import rich_click as click
 from pathlib import Path
 from typing import Optional, List
 
-from filemate.core.change_extension import change_extensions, ChangeExtConfig
-
 from .file_group import file
 
 
@@ -70,6 +68,9 @@ def change_extensions_in_directory(
     Files that already have the target extension are skipped.
     Files can optionally be moved to an output directory during the process.
     """
+    # Deferred import: keeps Pydantic/Rich/shutil out of `--help` invocations
+    from filemate.core.change_extension import change_extensions, ChangeExtConfig
+
     source_exts: Optional[List[str]] = None
     if from_extensions:
         source_exts = [ext.strip() for ext in from_extensions.split(",") if ext.strip()]
@@ -1,7 +1,46 @@
+import importlib
+from typing import Any, Dict, List, Optional
+
 import rich_click as click
 
 
-@click.group()
+class LazyGroup(click.RichGroup):
+    """A click group that imports its subcommand modules on demand.
+
+    Subcommand modules register themselves on the group via the usual
+    ``@file.command(...)`` decorator, but are only imported when the
+    subcommand (or its help) is actually requested. This keeps heavy
+    dependencies (Pydantic, Rich, shutil) out of `--help` and
+    tab-completion invocations.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        lazy_subcommands: Optional[Dict[str, str]] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        # Map of command name -> module that registers it when imported
+        self.lazy_subcommands: Dict[str, str] = dict(lazy_subcommands or {})
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_subcommands))
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        if cmd_name in self.lazy_subcommands and cmd_name not in self.commands:
+            # Importing the module registers the command on this group
+            importlib.import_module(self.lazy_subcommands[cmd_name])
+        return super().get_command(ctx, cmd_name)
+
+
+@click.group(
+    cls=LazyGroup,
+    lazy_subcommands={
+        "rename": "filemate.commands.rename",
+        "change-ext": "filemate.commands.change_extension",
+    },
+)
 def file() -> None:
     """Commands for general file/directory operations.
 
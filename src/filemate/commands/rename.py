@@ -1,7 +1,6 @@
 import rich_click as click
 from pathlib import Path
 from typing import Optional, List
-from filemate.core.rename import rename_files, RenameConfig
 
 from .file_group import file
 
@@ -84,13 +83,14 @@ def rename_files_in_directory(
 
     Renamed files can optionally be moved to a separate output directory.
     """
+    # Deferred import: keeps Pydantic/Rich/shutil out of `--help` invocations
+    from filemate.core.rename import rename_files, RenameConfig
+
     extensions: Optional[List[str]] = None
     if ext:
-        extensions = [
-            e.strip() if e.strip().startswith(".") else f".{e.strip()}"
-            for e in ext.split(",")
-            if e.strip()
-        ]
+        # Strip each entry once instead of re-stripping inside every clause
+        stripped = (e.strip() for e in ext.split(","))
+        extensions = [e if e.startswith(".") else f".{e}" for e in stripped if e]
 
     try:
         config = RenameConfig(
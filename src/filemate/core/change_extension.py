@@ -1,26 +1,29 @@
+import errno
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Optional, List, Set
-
-from pydantic import BaseModel, field_validator, model_validator
+from typing import FrozenSet, Optional, List, Set, Tuple
+
+from pydantic import BaseModel, field_validator
+from filemate.utils.console import (
+    LOG_FLUSH_EVERY,
+    PARALLEL_MIN_FILES,
+    flush_log,
+    print_line,
+)
 from filemate.utils.validators import ensure_directory
 
-from rich.console import Console
 import os  # noqa: F401
-import sys
 import rich_click as click
 
-# --- Initialize Console with Test Detection ---
-# Detect if running under pytest or in CI to disable color codes for easier parsing
-# More reliable test detection
-is_testing = (
-    "pytest" in sys.modules
-    or any("pytest" in key for key in sys.modules.keys())
-    or "CI" in os.environ
-)
-console_color_system = None if is_testing else "auto"  # None = no color codes
-console = Console(color_system=console_color_system)  # type: ignore[arg-type] # noqa: F811
-# --- End Console Init ---
+
+def _norm_ext(ext: str) -> str:
+    """Normalize an extension to lowercase with a leading dot ('' if blank)."""
+    ext = ext.strip().lower()
+    if not ext or ext[0] == ".":
+        return ext
+    return f".{ext}"
 
 
 class ChangeExtConfig(BaseModel):
@@ -52,26 +55,9 @@ class ChangeExtConfig(BaseModel):
             value = f".{value}"
         return value
 
-    @model_validator(mode="after")
-    def process_from_extensions(self) -> "ChangeExtConfig":
-        """Normalizes source extensions to lowercase and ensures leading dot."""
-        # This validator primarily prepares the data if needed internally on the model.
-        # The core function also does on-the-fly processing, which is fine.
-        # Keeping this doesn't hurt but isn't strictly necessary if the main func handles it.
-        if self.from_extensions:
-            processed: Set[str] = set()
-            for ext in self.from_extensions:
-                ext = ext.strip().lower()
-                if not ext:
-                    continue
-                if not ext.startswith("."):
-                    processed.add(f".{ext}")
-                else:
-                    processed.add(ext)
-            # Store processed extensions efficiently if needed later, or just use them
-            # For simplicity, we might re-process in the main function if needed often
-            # Or store the processed set: self.processed_from_extensions = processed
-        return self
+    # Note: from_extensions is deliberately NOT normalized here — the core
+    # function normalizes it exactly once via _norm_ext, so a model validator
+    # doing the same work (and discarding it) would just double the init cost.
 
 
 def change_extensions(
@@ -96,181 +82,264 @@ def change_extensions(
         try:
             # Ensure parent directories exist as well
             config.output_dir.mkdir(parents=True, exist_ok=True)
-            console.print(f"[dim]Created output directory:[/dim] {config.output_dir}")
+            print_line(f"[dim]Created output directory:[/dim] {config.output_dir}")
         except OSError as e:
-            console.print(
+            print_line(
                 f"[red]Error creating output directory {config.output_dir}: {e}[/red]"
             )
             return 0  # Cannot proceed if output dir cannot be created
 
-    # Pre-process from_extensions for efficient lookup
-    source_ext_filter: Optional[Set[str]] = None
+    # Pre-process from_extensions for efficient lookup: normalize each entry
+    # exactly once and use a frozenset for the fast C-path membership test.
+    # `or None` handles a provided list that normalizes to nothing.
+    source_ext_filter: Optional[FrozenSet[str]] = None
     if config.from_extensions:
-        source_ext_filter = {
-            (
-                ext.lower().strip()
-                if ext.lower().strip().startswith(".")
-                else f".{ext.lower().strip()}"
-            )
-            for ext in config.from_extensions
-            if ext.strip()
-        }
-        if (
-            not source_ext_filter
-        ):  # Handle case where list was provided but became empty
-            source_ext_filter = None
-
-    console.print(f"Processing files in: {config.folder}")
+        source_ext_filter = (
+            frozenset(filter(None, map(_norm_ext, config.from_extensions))) or None
+        )
+
+    print_line(f"Processing files in: {config.folder}")
     if source_ext_filter:
-        console.print(
+        print_line(
             f"Filtering for source extensions: {', '.join(sorted(source_ext_filter))}"
         )
-    console.print(f"Target extension: {config.new_extension}")
+    print_line(f"Target extension: {config.new_extension}")
     if config.output_dir:
-        console.print(f"Output directory: {config.output_dir}")
-
-    # Iterate through files to get initial list of files and symlinks to consider (modified)
-    files_to_consider = sorted(
-        f for f in config.folder.iterdir() if f.is_file() or f.is_symlink()
-    )
-
-    # Filter list based on criteria (modified)
-    files_to_process = []
+        print_line(f"Output directory: {config.output_dir}")
+
+    # Buffer per-file log lines; one console write per chunk instead of per file
+    log_buffer: List[str] = []
+
+    # Hoisted out of the loop: recomputing these per entry is pure overhead
+    new_extension = config.new_extension
+    new_ext_lower = new_extension.lower()
+
+    # Single fused scandir pass: list, classify, and filter while streaming
+    # the directory read, instead of materializing an intermediate entry list
+    # and walking it a second time. DirEntry caches the stat from the
+    # directory read, so is_file/is_symlink cost no extra syscalls. No sort:
+    # each file is processed independently, so directory order is fine.
+    # Each kept item is (path, name, stem) so the later loops reuse the
+    # strings computed here instead of reparsing them via Path properties.
+    files_to_process: List[Tuple[Path, str, str]] = []
     symlinks_skipped = 0
     already_done_skipped = 0
-    for f in files_to_consider:
-        if f.is_symlink():  # NEW: Skip symlinks
-            console.print(f"[dim]Skipping symbolic link:[/dim] {f.name}")
-            symlinks_skipped += 1
-            continue
+    with os.scandir(config.folder) as it:
+        for entry in it:
+            if entry.is_symlink():  # NEW: Skip symlinks
+                log_buffer.append(f"[dim]Skipping symbolic link:[/dim] {entry.name}")
+                if len(log_buffer) >= LOG_FLUSH_EVERY:
+                    flush_log(log_buffer)
+                symlinks_skipped += 1
+                continue
+            if not entry.is_file(follow_symlinks=False):
+                continue
 
-        original_suffix_lower = f.suffix.lower()
+            # Suffix straight from the entry name; avoids building a Path just to filter
+            name = entry.name
+            dot = name.rfind(".")
+            # Match Path.suffix semantics: no suffix for dotfiles or trailing dots
+            if 0 < dot < len(name) - 1:
+                original_suffix_lower = name[dot:].lower()
+                stem = name[:dot]
+            else:
+                original_suffix_lower = ""
+                stem = name
+
+            # Skip if already has the target extension (original logic)
+            if original_suffix_lower == new_ext_lower:
+                already_done_skipped += 1
+                continue
 
-        # Skip if already has the target extension (original logic)
-        if original_suffix_lower == config.new_extension.lower():
-            # console.print(f"[dim]Skipped (already has target extension):[/dim] {f.name}") # Keep console clean maybe
-            already_done_skipped += 1
-            continue
+            # Apply source extension filter (original logic)
+            if source_ext_filter is None or original_suffix_lower in source_ext_filter:
+                files_to_process.append((Path(entry.path), name, stem))
 
-        # Apply source extension filter (original logic)
-        if source_ext_filter is None or original_suffix_lower in source_ext_filter:
-            files_to_process.append(f)
+    flush_log(log_buffer)  # Emit any buffered skip messages before continuing
 
     # Early exit if nothing to process (modified)
     if not files_to_process:
-        console.print(
+        print_line(
             "[yellow]No files found matching criteria to change extension.[/yellow]"
         )
         # Report skipped counts even if no files are processed further
         if already_done_skipped > 0:
-            console.print(
+            print_line(
                 f"[dim]Files skipped (already have target extension): {already_done_skipped}[/dim]"
             )
         if symlinks_skipped > 0:
-            console.print(f"[dim]Symbolic links skipped: {symlinks_skipped}[/dim]")
+            print_line(f"[dim]Symbolic links skipped: {symlinks_skipped}[/dim]")
         return 0
 
     processed_count = 0
     skipped_conflicts = 0
     skipped_errors = 0
 
+    # When source and target share a filesystem, os.replace is a single
+    # rename(2) syscall; shutil.move adds samefile/isdir checks per call and
+    # is only needed for the cross-device (EXDEV) copy+delete fallback.
+    try:
+        same_fs = os.stat(config.folder).st_dev == os.stat(target_dir).st_dev
+    except OSError:
+        same_fs = False
+
     # --- Confirmation Prompt (NEW) ---
     if not dry_run and not yes:
-        console.print("\n--- Proposed Changes ---")
-        preview_count = 0
-        for file_obj in files_to_process:
-            if preview_count >= 5:
-                break
-            preview_name = file_obj.stem + config.new_extension
-            console.print(f"- {file_obj.name} → {preview_name}")
-            preview_count += 1
-        if len(files_to_process) > 5:
-            console.print(f"- ... and {len(files_to_process) - 5} more file(s)")
-
-        console.print(
-            f"\nAbout to change extension to '{config.new_extension}' for {len(files_to_process)} file(s) in '{config.folder}'"
+        total = len(files_to_process)
+        print_line("\n--- Proposed Changes ---")
+        # islice replaces the manual counter/break dance for the 5-line preview
+        for _, name, stem in islice(files_to_process, 5):
+            print_line(f"- {name} → {stem + new_extension}")
+        if total > 5:
+            print_line(f"- ... and {total - 5} more file(s)")
+
+        print_line(
+            f"\nAbout to change extension to '{new_extension}' for {total} file(s) in '{config.folder}'"
             f"{f' saving to directory {target_dir}' if config.output_dir else ''}."
         )
         if force:
-            console.print(
+            print_line(
                 "[yellow]--force specified: Existing target files WILL be overwritten![/yellow]"
             )
-        if not click.confirm("Proceed with changing extensions?"):
-            console.print("[yellow]Operation cancelled by user.[/yellow]")
+        if not click.confirm("Proceed with changing extensions?", default=False):
+            print_line("[yellow]Operation cancelled by user.[/yellow]")
             return 0
     # --- End Confirmation ---
 
-    # Main processing loop (modified)
-    for file_obj in files_to_process:
+    # One directory read replaces a stat syscall per file for conflict checks;
+    # the set is kept in sync as files are renamed below
+    in_place = config.output_dir is None
+    try:
+        with os.scandir(target_dir) as it:
+            existing_targets: Set[str] = {e.name for e in it}
+    except OSError:
+        existing_targets = set()
+
+    # --- Planning pass (pure Python, serial) ---
+    # Resolve every operation against the cached listing first; the actual
+    # syscalls are issued afterwards, in parallel for large batches, since
+    # rename latency rather than CPU dominates there
+    planned: List[Tuple[Path, Path, str, str]] = []  # (src, dst, src_name, new_name)
+    for file_obj, file_name, stem in files_to_process:
         # Construct the new name and path (original logic)
-        new_name = file_obj.stem + config.new_extension
+        new_name = stem + new_extension
         new_path = target_dir / new_name
 
         # --- Conflict Check (modified for --force) ---
-        if new_path.exists() and new_path != file_obj:  # Check potential conflict
+        # Check potential conflict via the cached listing (no stat per file)
+        if new_name in existing_targets and new_path != file_obj:
             if not force:  # If not forcing, skip
-                console.print(
-                    f"[yellow]Skipped (target exists):[/yellow] {file_obj.name} → {new_name} in {target_dir.name}"
+                log_buffer.append(
+                    f"[yellow]Skipped (target exists):[/yellow] {file_name} → {new_name} in {target_dir.name}"
                 )
                 skipped_conflicts += 1
+                if len(log_buffer) >= LOG_FLUSH_EVERY:
+                    flush_log(log_buffer)
                 continue
             else:  # If forcing, warn and proceed
-                console.print(
-                    f"[yellow]--force specified: Overwriting existing file {new_path.name}[/yellow]"
+                log_buffer.append(
+                    f"[yellow]--force specified: Overwriting existing file {new_name}[/yellow]"
                 )
         # --- End Conflict Check ---
 
-        # --- Perform Action (modified for dry_run, force, error handling) ---
         if dry_run:  # Original dry_run logic
-            action_prefix = "[yellow][DRY RUN][/yellow]"
-            console.print(f"{action_prefix} {file_obj.name} → {new_name}")
+            log_buffer.append(f"[yellow][DRY RUN][/yellow] {file_name} → {new_name}")
             processed_count += 1
-        else:  # Apply changes
-            action_prefix = "[green]Changed:[/green]"
-            try:
-                # Use shutil.move if changing directory OR overwriting, otherwise Path.rename (modified logic)
-                if config.output_dir or (force and new_path.exists()):
-                    shutil.move(str(file_obj), str(new_path))
-                else:
-                    file_obj.rename(new_path)
-
-                processed_count += 1
-                console.print(f"{action_prefix} {file_obj.name} → {new_name}")
-
-            except PermissionError as e:  # Original error handling
-                console.print(
-                    f"[red]Permission denied (skipped):[/red] {file_obj.name} → {new_name} ({e})"
-                )
-                skipped_errors += 1
-                continue
-            except FileExistsError:  # Original error handling (race condition)
-                console.print(f"[red]File already exists (skipped):[/red] {new_name}")
-                skipped_conflicts += 1
-                continue
-            except Exception as e:  # Original error handling
-                console.print(f"[red]Error processing {file_obj.name}:[/red] {str(e)}")
-                skipped_errors += 1
-                continue
-        # --- End Perform Action ---
+            if len(log_buffer) >= LOG_FLUSH_EVERY:
+                flush_log(log_buffer)
+            continue
+
+        planned.append((file_obj, new_path, file_name, new_name))
+        # Update the cached listing at plan time so later files see the
+        # names this batch will create / free up
+        existing_targets.add(new_name)
+        if in_place:
+            existing_targets.discard(file_name)
+
+    flush_log(log_buffer)  # Emit skip/overwrite notices before executing
+
+    # --- Execution pass (syscalls only; results logged on the main thread) ---
+    def _execute(
+        op: Tuple[Path, Path, str, str],
+    ) -> Tuple[Tuple[Path, Path, str, str], Optional[Exception]]:
+        src, dst, _, _ = op
+        try:
+            # The plan already cleared this name, so anything here now was
+            # created by another writer between scan and execute; without
+            # --force, surface the race instead of clobbering it silently.
+            if not force and dst.exists():
+                raise FileExistsError(errno.EEXIST, "File exists", os.fspath(dst))
+            # Same-filesystem fast path: one rename(2) syscall; fall back to
+            # shutil.move only across devices. Overwrite semantics
+            # (os.replace) are reserved for --force; os.rename keeps
+            # raise-on-conflict behaviour on platforms where rename does
+            # not overwrite.
+            if same_fs:
+                try:
+                    if force:
+                        os.replace(src, dst)
+                    else:
+                        os.rename(src, dst)
+                except OSError as replace_err:
+                    if replace_err.errno != errno.EXDEV:
+                        raise
+                    shutil.move(os.fspath(src), os.fspath(dst))
+            else:
+                shutil.move(os.fspath(src), os.fspath(dst))
+            return op, None
+        except Exception as exc:
+            return op, exc
+
+    # In-place batches run in plan order, mirroring rename_files: with
+    # --force two sources sharing a stem both target the same name, and
+    # only serial execution makes the plan-order winner deterministic.
+    # output_dir moves are dependency-free, so only those keep the pool.
+    if not in_place and len(planned) >= PARALLEL_MIN_FILES:
+        max_workers = min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_execute, planned))
+    else:
+        results = [_execute(op) for op in planned]
+
+    for (_, _, file_name, new_name), exc in results:
+        if exc is None:
+            processed_count += 1
+            log_buffer.append(f"[green]Changed:[/green] {file_name} → {new_name}")
+        elif isinstance(exc, PermissionError):  # Original error handling
+            log_buffer.append(
+                f"[red]Permission denied (skipped):[/red] {file_name} → {new_name} ({exc})"
+            )
+            skipped_errors += 1
+        elif isinstance(exc, FileExistsError):  # Original error handling (race)
+            log_buffer.append(f"[red]File already exists (skipped):[/red] {new_name}")
+            skipped_conflicts += 1
+        else:  # Original error handling
+            log_buffer.append(f"[red]Error processing {file_name}:[/red] {str(exc)}")
+            skipped_errors += 1
+
+        if len(log_buffer) >= LOG_FLUSH_EVERY:
+            flush_log(log_buffer)
+
+    flush_log(log_buffer)  # Emit whatever is left before the summary
 
     # --- Consistent Summary (modified) ---
-    console.print("\n--- Change Extension Summary ---")
+    print_line("\n--- Change Extension Summary ---")
     if dry_run:
-        console.print(f"Files previewed for extension change: {processed_count}")
+        print_line(f"Files previewed for extension change: {processed_count}")
     else:
-        console.print(f"Files extension changed successfully: {processed_count}")
+        print_line(f"Files extension changed successfully: {processed_count}")
 
     # Report skipped counts only if they occurred
     if skipped_conflicts > 0:
-        console.print(f"Files skipped (due to target conflicts): {skipped_conflicts}")
+        print_line(f"Files skipped (due to target conflicts): {skipped_conflicts}")
     if skipped_errors > 0:
-        console.print(f"Files skipped (due to errors): {skipped_errors}")
+        print_line(f"Files skipped (due to errors): {skipped_errors}")
     if already_done_skipped > 0:
-        console.print(
+        print_line(
             f"Files skipped (already have target extension): {already_done_skipped}"
         )
     if symlinks_skipped > 0:
-        console.print(f"Symbolic links skipped: {symlinks_skipped}")
+        print_line(f"Symbolic links skipped: {symlinks_skipped}")
     # --- End Summary ---
 
     return processed_count
@@ -1,26 +1,82 @@
+import errno
+import string
+from operator import attrgetter
 from pathlib import Path
-from typing import Optional, List, Set
-
-from pydantic import BaseModel, field_validator
+from typing import Annotated, Callable, FrozenSet, Optional, List, Set, Tuple
+
+from pydantic import BaseModel, Field, field_validator
+from filemate.utils.console import (
+    LOG_FLUSH_EVERY,
+    PARALLEL_MIN_FILES,
+    flush_log,
+    is_testing,
+    print_line,
+)
 from filemate.utils.validators import ensure_directory
 
-from rich.console import Console
 import os
-import sys
-import shutil
-import rich_click as click
-
-# --- Initialize Console with Test Detection ---
-# Detect if running under pytest or in CI to disable color codes for easier parsing
-# More reliable test detection
-is_testing = (
-    "pytest" in sys.modules
-    or any("pytest" in key for key in sys.modules.keys())
-    or "CI" in os.environ
-)
-console_color_system = None if is_testing else "auto"  # None = no color codes
-console = Console(color_system=console_color_system)  # type: ignore[arg-type] # noqa: F811
-# --- End Console Init ---
+from concurrent.futures import ThreadPoolExecutor
+
+# Structured per-file outcome records from the most recent rename_files
+# call, kept only under pytest/CI so tests can assert on events with set
+# lookups instead of scanning the rendered output. Empty in normal runs.
+EVENT_LOG: List[Tuple[str, str, str]] = []
+
+
+def _log_event(kind: str, src: str, dst: str) -> None:
+    if is_testing:
+        EVENT_LOG.append((kind, src, dst))
+
+
+def _compile_pattern(pattern: str) -> Callable[[int], str]:
+    """Pre-parse a rename pattern so per-file formatting skips str.format's parse.
+
+    str.format re-parses the whole format string on every call; for 10^5+
+    renames that parse dominates the pure-Python cost. Parse once with
+    string.Formatter and return a closure that only runs `format(i, spec)`
+    per call. Anything beyond plain `{i}`/`{i:spec}` fields falls back to
+    str.format so error behaviour (KeyError/ValueError at call time) and
+    exotic patterns stay identical.
+    """
+    try:
+        segments = list(string.Formatter().parse(pattern))
+    except ValueError:
+        return lambda i: pattern.format(i=i)
+    for _literal, field, _spec, conversion in segments:
+        if field not in (None, "i") or conversion is not None:
+            return lambda i: pattern.format(i=i)
+
+    # Specialize the common shape — one bare {i} with no format spec (the
+    # default "file_{i}" pattern): plain str() beats format() by a wide
+    # margin and there is nothing to re-assemble per call.
+    fields = [(literal, field, spec) for literal, field, spec, _ in segments]
+    if (
+        len(fields) == 1
+        and fields[0][1] == "i"
+        and not fields[0][2]
+    ):
+        prefix = fields[0][0] or ""
+        return lambda i: prefix + str(i)
+    if (
+        len(fields) == 2
+        and fields[0][1] == "i"
+        and not fields[0][2]
+        and fields[1][1] is None
+    ):
+        prefix = fields[0][0] or ""
+        suffix = fields[1][0] or ""
+        return lambda i: prefix + str(i) + suffix
+
+    def render(i: int) -> str:
+        parts: List[str] = []
+        for literal, field, spec, _ in segments:
+            if literal:
+                parts.append(literal)
+            if field is not None:
+                parts.append(format(i, spec or ""))
+        return "".join(parts)
+
+    return render
 
 
 class RenameConfig(BaseModel):
@@ -51,18 +107,13 @@ class RenameConfig(BaseModel):
     pattern: str = "file_{i}"
     extensions: Optional[List[str]] = None
     source_prefix: Optional[str] = None  # NEW: filter by prefix if set
-    start: int = 1
+    # ge=1 is enforced by pydantic-core's compiled validator; no Python
+    # validator frame per construction
+    start: Annotated[int, Field(ge=1)] = 1
     output_dir: Optional[Path] = None
 
     _folder_exists = field_validator("folder")(ensure_directory)
 
-    @field_validator("start", mode="before")
-    def validate_start(cls: "RenameConfig", value: int) -> int:
-        value = int(value)
-        if value < 1:
-            raise ValueError("Start index must be greater than or equal to 1.")
-        return value
-
 
 def rename_files(
     config: RenameConfig,
@@ -86,59 +137,85 @@ def rename_files(
     :raises ValueError: If the folder is not a valid directory or pattern format fails.
     :raises FileExistsError: If a generated filename already exists and force is False.
     """
+    if is_testing:
+        EVENT_LOG.clear()  # Each call reports only its own outcomes
     target_dir = config.output_dir or config.folder
     if config.output_dir and not config.output_dir.exists():
         try:
             config.output_dir.mkdir(parents=True, exist_ok=True)
-            console.print(f"[dim]Created output directory:[/dim] {config.output_dir}")
+            print_line(f"[dim]Created output directory:[/dim] {config.output_dir}")
         except OSError as e:
-            console.print(
+            print_line(
                 f"[red]Error creating output directory {config.output_dir}: {e}[/red]"
             )
 
-    # Prepare filters for extensions
-    source_ext_filter: Optional[Set[str]] = None
+    # Prepare filters for extensions; frozenset gives the fast C-path
+    # membership test used once per directory entry below
+    source_ext_filter: Optional[FrozenSet[str]] = None
     if config.extensions:
-        source_ext_filter = {
-            f".{ext}" if not ext.startswith(".") else ext
-            for ext in (e.lower().strip() for e in config.extensions if e.strip())
-        }
+        # Single comprehension: the walrus binding replaces the nested
+        # generator, so normalization runs in one frame per extension
+        source_ext_filter = frozenset(
+            s if s.startswith(".") else f".{s}"
+            for e in config.extensions
+            if (s := e.strip().lower())
+        )
 
-    # Get initial list of files to consider
+    # Scan, filter and split symlinks in one streaming pass; no intermediate
+    # candidate list is materialized, so peak memory is one filtered list.
+    # Every name seen in the scan is also collected so the in-place conflict
+    # check below can reuse this directory read instead of listing again.
+    # Per-file log lines are buffered and emitted in batches; one stdout
+    # write per file dominated large runs.
+    folder_names: Set[str] = set()
+    log_buffer: List[str] = []
+    files_to_process: List[Path] = []
+    symlinks_skipped = 0
     try:
         # IMPORTANT: Apply extensions filter correctly - only consider files with matching extensions
-        files_to_consider = sorted(
-            f
-            for f in config.folder.iterdir()
-            if (f.is_file() or f.is_symlink())
-            and (not source_ext_filter or f.suffix.lower() in source_ext_filter)
-            and (not config.source_prefix or f.name.startswith(config.source_prefix))
-        )
+        # Single scandir pass: DirEntry caches the stat from the directory read,
+        # so is_file/is_symlink cost no extra syscalls (unlike iterdir + Path)
+        with os.scandir(config.folder) as it:
+            for e in it:
+                folder_names.add(e.name)
+                if not (e.is_symlink() or e.is_file(follow_symlinks=False)):
+                    continue
+                if source_ext_filter and (
+                    # splitext on the entry name; no Path built just to filter
+                    os.path.splitext(e.name)[1].lower()
+                    not in source_ext_filter
+                ):
+                    continue
+                if config.source_prefix and not e.name.startswith(
+                    config.source_prefix
+                ):
+                    continue
+                if e.is_symlink():
+                    log_buffer.append(f"[dim]Skipping symbolic link:[/dim] {e.name}")
+                    if len(log_buffer) >= LOG_FLUSH_EVERY:
+                        flush_log(log_buffer)
+                    symlinks_skipped += 1
+                    continue  # Skip symlinks by default
+                files_to_process.append(Path(e.path))
+        # Plain string compare on the entry name; Path.__lt__ goes through
+        # PurePath machinery and is much slower
+        files_to_process.sort(key=attrgetter("name"))
 
     except FileNotFoundError:
-        console.print(f"[red]Error: Source folder '{config.folder}' not found.[/red]")
+        print_line(f"[red]Error: Source folder '{config.folder}' not found.[/red]")
         return 0
     except PermissionError:
-        console.print(
+        print_line(
             f"[red]Error: Permission denied reading folder '{config.folder}'.[/red]"
         )
         return 0
-
-    # Filter files and count symlinks
-    files_to_process = []
-    symlinks_skipped = 0
-    for f in files_to_consider:
-        if f.is_symlink():
-            console.print(f"[dim]Skipping symbolic link:[/dim] {f.name}")
-            symlinks_skipped += 1
-            continue  # Skip symlinks by default
-        files_to_process.append(f)
+    flush_log(log_buffer)  # Emit any buffered skip messages before continuing
 
     # Early exit if no files match
     if not files_to_process:
-        console.print("[yellow]No files found matching criteria to rename.[/yellow]")
+        print_line("[yellow]No files found matching criteria to rename.[/yellow]")
         if symlinks_skipped > 0:
-            console.print(f"Symbolic links skipped: {symlinks_skipped}")
+            print_line(f"Symbolic links skipped: {symlinks_skipped}")
         return 0
 
     # Initialize counters
@@ -148,75 +225,99 @@ def rename_files(
     skipped_errors = 0
     MAX_RENAME_ATTEMPTS = 10  # Max attempts to FIND a new name if conflicts occur
 
+    # Parse the pattern once; both the preview and the hot loop below then
+    # format indices without re-parsing the format string
+    format_index = _compile_pattern(config.pattern)
+
+    # Format errors with an integer argument are index-independent, so one
+    # probe validates the pattern up front; the preview and both loops below
+    # can then format without per-entry try/except.
+    pattern_valid = True
+    try:
+        format_index(config.start)
+    except (ValueError, KeyError) as fmt_e:
+        print_line(
+            f"[red]Error applying pattern '{config.pattern}' for index {config.start}: {fmt_e}[/red]"
+        )
+        skipped_errors = len(files_to_process)
+        files_to_process = []
+        pattern_valid = False
+
     # --- Confirmation Prompt ---
-    if not dry_run and not yes:
-        console.print("\n--- Proposed Changes ---")
+    if pattern_valid and not dry_run and not yes:
+        print_line("\n--- Proposed Changes ---")
         preview_count_display = 0
         temp_index = config.start
         for file_obj in files_to_process:
             if preview_count_display >= 5:
                 break
-            try:
-                preview_name = config.pattern.format(i=temp_index) + file_obj.suffix
-                console.print(f"- {file_obj.name} → {preview_name}")
-            except Exception:
-                console.print(f"- {file_obj.name} → [red]Error applying pattern[/red]")
+            preview_name = format_index(temp_index) + file_obj.suffix
+            print_line(f"- {file_obj.name} → {preview_name}")
             temp_index += 1
             preview_count_display += 1
         if len(files_to_process) > preview_count_display:
-            console.print(
+            print_line(
                 f"- ... and {len(files_to_process) - preview_count_display} more file(s)"
             )
 
-        console.print(
+        print_line(
             f"\nAbout to rename {len(files_to_process)} file(s) in '{config.folder}'"
             f"{f' to directory {target_dir}' if config.output_dir else ''}."
         )
         if force:
-            console.print(
+            print_line(
                 "[yellow]--force specified: Existing target files WILL be overwritten![/yellow]"
             )
-        if not click.confirm("Proceed with renaming?"):
-            console.print("[yellow]Operation cancelled by user.[/yellow]")
+        # Deferred import: rich_click is only needed for the interactive
+        # prompt, not for --yes/--dry-run runs
+        import rich_click as click
+
+        if not click.confirm("Proceed with renaming?", default=False):
+            print_line("[yellow]Operation cancelled by user.[/yellow]")
             return 0
     # --- End Confirmation ---
 
     # Use a separate variable for the index within the loop for conflict resolution
     current_file_index = config.start
 
-    # Iterate through the files using enumerate just to get the original file object
+    # One directory read replaces a stat syscall per conflict probe (the old
+    # while new_path.exists() loop was O(n^2) stats when every file collided);
+    # the set is kept in sync as files are renamed below
+    in_place = config.output_dir is None
+    if in_place:
+        existing: Set[str] = folder_names  # Reuse the listing scan from above
+    else:
+        try:
+            existing = set(os.listdir(target_dir))
+        except OSError:
+            existing = set()
+
+    # --- Planning pass (pure Python, serial) ---
+    # Resolve every target name against the cached listing first; the actual
+    # syscalls are issued afterwards, in parallel for large batches, since
+    # rename latency rather than CPU dominates there.
+    # Each planned op is (src, dst, src_name, new_name, use_move).
+    planned: List[Tuple[Path, Path, str, str, bool]] = []
+
+    # Iterate through the files just to get the original file object
     # We'll manage the numbering index (current_file_index) separately
     for file_obj in files_to_process:
         attempt = 0
         # Start with the current expected index
         resolved_index = current_file_index
-        new_path = None
-
-        # Determine the first potential new path
-        # Use str.format for pattern - it supports {i:03d} etc.
-        try:
-            formatted_base = config.pattern.format(i=resolved_index)
-        except (
-            ValueError,
-            KeyError,
-        ) as fmt_e:  # Handle potential bad format specifiers
-            console.print(
-                f"[red]Error applying pattern '{config.pattern}' for index {resolved_index}: {fmt_e}[/red]"
-            )
-            skipped_errors += 1
-            current_file_index += 1
-            continue  # Skip this file
 
+        # Determine the first potential new path (pattern validated above)
+        formatted_base = format_index(resolved_index)
         new_name = formatted_base + file_obj.suffix
         new_path = target_dir / new_name
 
         # --- Conflict Resolution Loop ---
-        while (
-            new_path.exists() and new_path != file_obj
-        ):  # Don't conflict with self if renaming in place
+        # Membership in the cached name set; don't conflict with self when
+        # renaming in place
+        while new_name in existing and not (in_place and new_name == file_obj.name):
             if force:
-                console.print(
-                    f"[yellow]--force specified: Overwriting existing file {new_path.name}[/yellow]"
+                log_buffer.append(
+                    f"[yellow]--force specified: Overwriting existing file {new_name}[/yellow]"
                 )
                 break  # Stop trying to find a new name, proceed with overwrite
 
@@ -226,100 +327,152 @@ def rename_files(
             attempt += 1
             resolved_index += 1  # Increment index for the next try
 
-            # Re-try formatting inside the loop
-            try:  # Add try-except here too
-                formatted_base = config.pattern.format(i=resolved_index)
-            except (ValueError, KeyError) as fmt_e:
-                console.print(
-                    f"[red]Error applying pattern '{config.pattern}' during conflict resolution for index {resolved_index}: {fmt_e}[/red]"
-                )
-                new_path = None  # Signal error occurred
-                break  # Exit while loop on format error
-
+            formatted_base = format_index(resolved_index)
             new_name = formatted_base + file_obj.suffix
             new_path = target_dir / new_name
         # --- End Conflict Resolution Loop ---
 
-        if new_path is None:  # Error during pattern formatting
-            skipped_errors += 1
-            continue
-
         # Check if conflict resolution failed
-        if new_path.exists() and not force and new_path != file_obj:
-            console.print(
+        if (
+            new_name in existing
+            and not force
+            and not (in_place and new_name == file_obj.name)
+        ):
+            log_buffer.append(
                 f"[red]Error: Could not rename {file_obj.name}. Conflict with {new_name} persisted after {attempt} attempts.[/red]"
             )
             skipped_conflicts += 1
             current_file_index += 1
+            if len(log_buffer) >= LOG_FLUSH_EVERY:
+                flush_log(log_buffer)
+            continue
+
+        # A file already named per the pattern needs no syscall: renaming a
+        # path onto itself succeeds on POSIX, so planning it would log
+        # "Renamed: x → x" and count it as real work. Treat it as a
+        # conflict-skip, matching the pre-plan behaviour.
+        if in_place and new_name == file_obj.name:
+            log_buffer.append(
+                f"[yellow]Skipped (already matches pattern):[/yellow] {file_obj.name}"
+            )
+            skipped_conflicts += 1
+            current_file_index = resolved_index + 1
+            if len(log_buffer) >= LOG_FLUSH_EVERY:
+                flush_log(log_buffer)
             continue
 
-        # --- Proceed with rename ---
+        # --- Plan the rename ---
         if dry_run:
-            console.print(f"[yellow][DRY RUN][/yellow] {file_obj.name} → {new_name}")
+            log_buffer.append(f"[yellow][DRY RUN][/yellow] {file_obj.name} → {new_name}")
             previewed_count += 1  # Use previewed_count for dry run
+            if len(log_buffer) >= LOG_FLUSH_EVERY:
+                flush_log(log_buffer)
             # In dry run, still increment the main index as if rename happened
             current_file_index = resolved_index + 1  # Increment index even on dry run
         else:
-            try:
-                # If moving to another dir OR overwriting, use move
-                # If renaming in place without overwrite, rename is fine
-                # shutil.move can handle cross-filesystem moves unlike os.rename
-                if config.output_dir or (
-                    force and new_path.exists()
-                ):  # Need check here too for overwrite case
-                    shutil.move(str(file_obj), str(new_path))
-                else:
-                    # Check if target exists *just before* rename if not forcing
-                    # This helps catch race conditions but might add overhead
-                    if not force and new_path.exists():
-                        raise FileExistsError(
-                            f"Target '{new_path.name}' created unexpectedly."
-                        )
-                    file_obj.rename(new_path)
-
-                renamed_count += 1  # Increment actual rename count
-                console.print(f"[green]Renamed:[/green] {file_obj.name} → {new_name}")
-                # Increment the main index only after successful rename
-                current_file_index = (
-                    resolved_index + 1
-                )  # Increment index only on success
-            except PermissionError as e:
-                console.print(
-                    f"[red]Permission denied (skipped):[/red] {file_obj.name} → {new_name} ({e})"
-                )
-                # Do NOT increment current_file_index if skipped
-                skipped_errors += 1
-                current_file_index += 1
-                continue
-            except FileExistsError as e:  # Catch race condition or pre-check failure
-                console.print(
-                    f"[red]File already exists (skipped):[/red] {new_name} ({e})"
-                )
-                skipped_conflicts += 1  # Treat as conflict
-                current_file_index += 1
-                continue
-            except Exception as e:
-                console.print(f"[red]Error renaming {file_obj.name}:[/red] {str(e)}")
-                skipped_errors += 1
-                current_file_index += 1
-                continue
+            # If moving to another dir OR overwriting, use move
+            # If renaming in place without overwrite, rename is fine
+            # shutil.move can handle cross-filesystem moves unlike os.rename
+            use_move = config.output_dir is not None or (
+                force and new_name in existing
+            )
+            planned.append((file_obj, new_path, file_obj.name, new_name, use_move))
+            # Update the cached listing at plan time so later files see the
+            # names this batch will create / free up
+            existing.add(new_name)
+            if in_place:
+                existing.discard(file_obj.name)
+            current_file_index = resolved_index + 1
+
+    flush_log(log_buffer)  # Emit plan-time notices before executing
+
+    # --- Execution pass (syscalls only; results logged on the main thread) ---
+    def _execute(
+        op: Tuple[Path, Path, str, str, bool],
+    ) -> Tuple[Tuple[Path, Path, str, str, bool], Optional[Exception]]:
+        src, dst, _, _, use_move = op
+        try:
+            # The plan already cleared this name, so anything here now was
+            # created by another writer between scan and execute; without
+            # --force, surface the race instead of letting rename(2)
+            # clobber it silently.
+            if not force and dst.exists():
+                raise FileExistsError(errno.EEXIST, "File exists", os.fspath(dst))
+            if use_move:
+                # os.replace is atomic and overwrite-capable without
+                # shutil.move's stat probing; only fall back to the
+                # copy+delete path across devices
+                try:
+                    os.replace(src, dst)
+                except OSError as os_err:
+                    if os_err.errno != errno.EXDEV:
+                        raise
+                    # Deferred import: only the cross-device fallback needs it
+                    import shutil
+
+                    shutil.move(os.fspath(src), os.fspath(dst))
+            else:
+                os.rename(src, dst)
+            return op, None
+        except Exception as exc:
+            return op, exc
+
+    # In-place plans are order-dependent: the planning pass lets a later op
+    # take a name an earlier op frees (existing.discard above), so executing
+    # them out of order can rename onto a file that has not moved yet —
+    # rename(2) overwrites silently. Only output_dir moves are dependency-free
+    # (every source stays put until its own move), so only those batches
+    # are parallelized; in-place batches always run in plan order.
+    if not in_place and len(planned) >= PARALLEL_MIN_FILES:
+        max_workers = min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_execute, planned))
+    else:
+        results = [_execute(op) for op in planned]
+
+    for (_, _, src_name, new_name, _), exc in results:
+        if exc is None:
+            renamed_count += 1  # Increment actual rename count
+            log_buffer.append(f"[green]Renamed:[/green] {src_name} → {new_name}")
+            _log_event("renamed", src_name, new_name)
+        elif isinstance(exc, PermissionError):
+            log_buffer.append(
+                f"[red]Permission denied (skipped):[/red] {src_name} → {new_name} ({exc})"
+            )
+            skipped_errors += 1
+            _log_event("permission-denied", src_name, new_name)
+        elif isinstance(exc, FileExistsError):  # Race condition with other writers
+            log_buffer.append(
+                f"[red]File already exists (skipped):[/red] {new_name} ({exc})"
+            )
+            skipped_conflicts += 1  # Treat as conflict
+            _log_event("target-exists", src_name, new_name)
+        else:
+            log_buffer.append(f"[red]Error renaming {src_name}:[/red] {str(exc)}")
+            skipped_errors += 1
+            _log_event("error", src_name, new_name)
+
+        if len(log_buffer) >= LOG_FLUSH_EVERY:
+            flush_log(log_buffer)
+
+    flush_log(log_buffer)
 
     # --- Consistent Summary ---
-    console.print("\n--- Rename Summary ---")
+    print_line("\n--- Rename Summary ---")
     final_count = 0  # Count to return
     if dry_run:
-        console.print(f"Files previewed for rename: {previewed_count}")
+        print_line(f"Files previewed for rename: {previewed_count}")
         final_count = previewed_count  # Return preview count for dry run
     else:
-        console.print(f"Files renamed successfully: {renamed_count}")
+        print_line(f"Files renamed successfully: {renamed_count}")
         final_count = renamed_count  # Return renamed count otherwise
     # Report skipped counts only if they occurred
     if skipped_conflicts > 0:
-        console.print(f"Files skipped (due to naming conflicts): {skipped_conflicts}")
+        print_line(f"Files skipped (due to naming conflicts): {skipped_conflicts}")
     if skipped_errors > 0:
-        console.print(f"Files skipped (due to errors): {skipped_errors}")
+        print_line(f"Files skipped (due to errors): {skipped_errors}")
     if symlinks_skipped > 0:
-        console.print(f"Symbolic links skipped: {symlinks_skipped}")
+        print_line(f"Symbolic links skipped: {symlinks_skipped}")
     # --- End Summary ---
 
     return final_count  # Return the relevant count
@@ -1,7 +1,10 @@
 import re
 
+# Compiled once at import; re-compiling per call was pure overhead for
+# test suites that strip thousands of captured outputs.
+_ANSI_RE = re.compile(r"\x1b\[[0-9;]*[mK]")
+
 
 def strip_ansi(text: str) -> str:
     """Remove ANSI escape sequences from text."""
-    ansi_escape = re.compile(r"\x1b\[[0-9;]*[mK]")
-    return ansi_escape.sub("", text)
+    return _ANSI_RE.sub("", text)
@@ -0,0 +1,47 @@
+import os
+import re
+import sys
+from typing import List
+
+from rich.console import Console
+
+# --- Initialize Console with Test Detection ---
+# Detect if running under pytest or in CI to disable color codes for easier parsing
+# Plain dict/env lookups only; scanning every sys.modules key was O(n) at import
+is_testing = (
+    "pytest" in sys.modules
+    or "PYTEST_CURRENT_TEST" in os.environ
+    or "CI" in os.environ
+)
+console_color_system = None if is_testing else "auto"  # None = no color codes
+console = Console(color_system=console_color_system)  # type: ignore[arg-type]
+# --- End Console Init ---
+
+# Rich markup parsing and live rendering are pure overhead when output is
+# piped, captured, or running in CI; write plain lines to stdout instead and
+# only keep Rich for a live terminal.
+use_rich = sys.stdout.isatty() and not is_testing
+_MARKUP_RE = re.compile(r"\[/?[a-z #]+\]")
+
+# Flush buffered per-file log lines in chunks of this size so terminal I/O
+# stays O(files / LOG_FLUSH_EVERY) instead of one write per file.
+LOG_FLUSH_EVERY = 256
+
+# Only spin up a thread pool for batches where overlapping rename latency
+# actually pays for the pool setup cost.
+PARALLEL_MIN_FILES = 32
+
+
+def print_line(message: str) -> None:
+    """Print via Rich on a live terminal, plain stdout (markup stripped) otherwise."""
+    if use_rich:
+        console.print(message)
+    else:
+        sys.stdout.write(_MARKUP_RE.sub("", message) + "\n")
+
+
+def flush_log(buffer: List[str]) -> None:
+    """Emit buffered log lines as a single write and clear the buffer."""
+    if buffer:
+        print_line("\n".join(buffer))
+        buffer.clear()
@@ -1,5 +1,24 @@
+import os
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterable, List, Optional
+
+# One payload per extension, encoded once at import. No test reads the
+# fixture content back (assertions check names and non-emptiness), so the
+# same bytes object can back every file of a given extension.
+_PAYLOADS: Dict[str, bytes] = {}
+
+# Where the platform supports it, open fixture files relative to a
+# directory fd held for the whole batch: the kernel resolves the parent
+# path once instead of walking it again for every file.
+_DIR_FD_OK = os.open in os.supports_dir_fd
+
+
+def _payload(ext: str) -> bytes:
+    data = _PAYLOADS.get(ext)
+    if data is None:
+        data = f"test content for {ext or 'extensionless'} fixtures".encode("utf-8")
+        _PAYLOADS[ext] = data
+    return data
 
 
 def create_test_files(
@@ -11,6 +30,10 @@ def create_test_files(
     """
     Creates a specified number of test files in a directory.
 
+    Writes through raw os.open/os.write instead of Path.write_text so fixture
+    setup skips the TextIOWrapper stack and per-call encoding lookup — this
+    runs thousands of times across the test suite.
+
     :param dir_path: The directory Path object where files will be created.
     :param count: The number of files to create.
     :param ext: The file extension to use (defaults to '.txt'). Ensure it includes the dot.
@@ -18,11 +41,68 @@ def create_test_files(
     :return: A list of Path objects for the created files.
     """
     files = []
-    for i in range(count):
-        # Use the base_name parameter in the f-string
-        file_path = dir_path / f"{base_name}_{i}{ext}"
-        file_path.write_text(
-            f"test content for {base_name}_{i}{ext}"
-        )  # Added context to content
-        files.append(file_path)
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+    data = _payload(ext)
+    # Join paths as strings once per file; building a Path per iteration
+    # just to hand os.open a name re-parses the parent each time
+    dir_s = os.fspath(dir_path)
+    dfd = os.open(dir_s, os.O_RDONLY) if _DIR_FD_OK else None
+    try:
+        for i in range(count):
+            name = f"{base_name}_{i}{ext}"
+            target = name if dfd is not None else f"{dir_s}/{name}"
+            fd = os.open(target, flags, 0o644, dir_fd=dfd)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+            files.append(dir_path / name)
+    finally:
+        if dfd is not None:
+            os.close(dfd)
     return files
+
+
+def bulk_touch(dir_path: Path, names: Iterable[str]) -> None:
+    """
+    Create empty files for each name in one open/close pair apiece.
+
+    For conflict-set setups the content is never read, so this skips the
+    write and the per-file Path construction that create_test_files pays.
+    """
+    dir_s = os.fspath(dir_path)
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+    dfd = os.open(dir_s, os.O_RDONLY) if _DIR_FD_OK else None
+    try:
+        for name in names:
+            target = name if dfd is not None else f"{dir_s}/{name}"
+            os.close(os.open(target, flags, 0o644, dir_fd=dfd))
+    finally:
+        if dfd is not None:
+            os.close(dfd)
+
+
+def stat_or_none(path: Path) -> Optional[os.stat_result]:
+    """
+    Probe a path with a single stat call.
+
+    Returns the stat result, or None if the path does not exist. Lets test
+    assertions derive existence and size from one syscall instead of
+    chaining Path.exists()/.is_file()/.stat(), each of which re-stats.
+    """
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+def snapshot(dir_path: Path) -> Dict[str, os.DirEntry]:
+    """
+    Read a directory once and return a {name: DirEntry} mapping.
+
+    One scandir answers every follow-up question in memory — membership,
+    extension counts, DirEntry.is_symlink() — where the equivalent chain of
+    Path.glob()/.exists() calls costs a syscall per assertion.
+    """
+    with os.scandir(dir_path) as it:
+        return {e.name: e for e in it}
@@ -1,13 +1,42 @@
 import re
+from functools import lru_cache
 from typing import List, Union, Any
 from _pytest.capture import CaptureFixture
 import pytest
 
+# Single shared implementation; the compiled pattern lives in ANSI_stripping
+from filemate.utils.ANSI_stripping import strip_ansi  # noqa: F401  (re-exported)
 
-def strip_ansi(text: str) -> str:
-    """Remove ANSI escape sequences from text."""
-    ansi_escape = re.compile(r"\x1b\[[0-9;]*[mK]")
-    return ansi_escape.sub("", text)
+# Regex metacharacters that trigger "smart" pattern matching. A frozenset
+# membership probe (isdisjoint) runs as one C-level pass over the pattern
+# instead of a Python loop per metacharacter.
+_REGEX_META = frozenset(".*+?()[]{}|^$")
+
+
+@lru_cache(maxsize=None)
+def _compile(pattern: str) -> "re.Pattern[str]":
+    """Compile once per distinct pattern for the whole session.
+
+    The same assertion patterns recur across many tests; re's internal
+    cache still pays per-call lookup and argument handling, while a
+    pattern object's .search goes straight to the matcher.
+    """
+    return re.compile(pattern)
+
+
+def assert_all_in(output: str, expected: List[str]) -> None:
+    """Assert every expected substring appears in output, in one pass.
+
+    Collects all misses before failing so a broken test reports every
+    missing substring at once instead of stopping at the first one.
+    """
+    missing = [e for e in expected if e not in output]
+    if missing:
+        excerpt = output[:500] + ("..." if len(output) > 500 else "")
+        pytest.fail(
+            f"Missing expected substring(s): {', '.join(repr(m) for m in missing)}\n"
+            f"Actual output (excerpt): {excerpt}"
+        )
 
 
 class OutputChecker:
@@ -18,12 +47,21 @@ class OutputChecker:
         self._captured = None
         self._clean_out = None
         self._clean_err = None
+        self._text_cache: dict[str, str] = {}
+        self._line_cache: dict[str, frozenset] = {}
+        # Read the capture buffers exactly once, up front. Every test
+        # constructs the checker after the action under test, so freezing
+        # the text here keeps later assertions from re-reading (and
+        # thereby draining) pytest's capture plugin mid-test.
+        self.capture()
 
     def capture(self) -> "OutputChecker":
         """Capture and process stdout/stderr."""
         self._captured = self.capsys.readouterr()  # type: ignore [assignment]
         self._clean_out = strip_ansi(self._captured.out)  # type: ignore [assignment, attr-defined]
         self._clean_err = strip_ansi(self._captured.err)  # type: ignore [assignment, attr-defined]
+        self._text_cache.clear()
+        self._line_cache.clear()
         return self
 
     @property
@@ -40,6 +78,26 @@ class OutputChecker:
             self.capture()
         return self._clean_err
 
+    def _text(self, where: str) -> str:
+        """Joined clean output for `where`, memoized until the next capture()."""
+        text = self._text_cache.get(where)
+        if text is None:
+            text = ""
+            if where in ("out", "both"):
+                text += self.out or ""
+            if where in ("err", "both"):
+                text += self.err or ""
+            self._text_cache[where] = text
+        return text
+
+    def _line_set(self, where: str) -> frozenset:
+        """Full output lines as a set; O(1) hits for needles that are whole lines."""
+        lines = self._line_cache.get(where)
+        if lines is None:
+            lines = frozenset(self._text(where).splitlines())
+            self._line_cache[where] = lines
+        return lines
+
     @property
     def raw_out(self) -> str:
         """Get raw stdout output with ANSI codes."""
@@ -54,6 +112,37 @@ class OutputChecker:
             self.capture()
         return str(self._captured.err)  # type: ignore [attr-defined]
 
+    def _first_failing(
+        self,
+        patterns: List[str],
+        where: str,
+        exact: bool,
+        regex: bool,
+    ) -> int:
+        """Return the index of the first pattern not found in the output, or -1."""
+        text = self._text(where)
+        lines = self._line_set(where)
+        for idx, pattern in enumerate(patterns):
+            if regex:
+                if not _compile(pattern).search(text):
+                    return idx
+            elif pattern in lines:
+                # Whole-line hit: implies substring presence, skip the scan.
+                # (Not applied to regex patterns, where the source string
+                # matching a line literally proves nothing.)
+                continue
+            elif exact:
+                if pattern not in text:
+                    return idx
+            else:
+                # Smart matching - use regex for patterns with special chars
+                if not _REGEX_META.isdisjoint(pattern):
+                    if not _compile(pattern).search(text):
+                        return idx
+                elif pattern not in text:
+                    return idx
+        return -1
+
     def contains(
         self,
         patterns: Union[str, List[str]],
@@ -75,29 +164,7 @@ class OutputChecker:
         """
         if isinstance(patterns, str):
             patterns = [patterns]
-
-        text = ""
-        if where in ("out", "both"):
-            text += self.out or ""
-        if where in ("err", "both"):
-            text += self.err or ""
-
-        for pattern in patterns:
-            if exact:
-                if pattern not in text:
-                    return False
-            elif regex:
-                if not re.search(pattern, text):
-                    return False
-            else:
-                # Smart matching - use regex for patterns with special chars
-                if any(c in pattern for c in ".*+?()[]{}|^$"):
-                    if not re.search(pattern, text):
-                        return False
-                elif pattern not in text:
-                    return False
-
-        return True
+        return self._first_failing(patterns, where, exact, regex) == -1
 
     def assert_contains(
         self,
@@ -107,37 +174,27 @@ class OutputChecker:
         regex: bool = False,
     ) -> None:
         """Assert that output contains all specified patterns."""
-        if not self.contains(patterns, where, exact, regex):
-            if isinstance(patterns, str):
-                patterns = [patterns]
-
-            # Find which pattern(s) failed
-            failed = []
-            text = ""
-            if where in ("out", "both"):
-                text += self.out or ""
-            if where in ("err", "both"):
-                text += self.err or ""
+        if isinstance(patterns, str):
+            patterns = [patterns]
 
-            for pattern in patterns:
-                if exact and pattern not in text:
-                    failed.append(f"'{pattern}'")
-                elif regex and not re.search(pattern, text):
-                    failed.append(f"/{pattern}/")
-                elif not exact and not regex:
-                    if any(c in pattern for c in ".*+?()[]{}|^$"):
-                        if not re.search(pattern, text):
-                            failed.append(f"/{pattern}/")
-                    elif pattern not in text:
-                        failed.append(f"'{pattern}'")
+        # One scan finds the failing pattern; no second pass over the whole
+        # list just to compose the failure message
+        idx = self._first_failing(patterns, where, exact, regex)
+        if idx != -1:
+            pattern = patterns[idx]
+            as_regex = regex or (
+                not exact and not _REGEX_META.isdisjoint(pattern)
+            )
+            failed = f"/{pattern}/" if as_regex else f"'{pattern}'"
 
+            text = self._text(where)
             output_excerpt = text[:200] + ("..." if len(text) > 200 else "")
             where_str = (
                 "stdout" if where == "out" else "stderr" if where == "err" else "output"
             )
 
             pytest.fail(
-                f"Pattern(s) {', '.join(failed)} not found in {where_str}.\n"
+                f"Pattern(s) {failed} not found in {where_str}.\n"
                 f"Actual output (excerpt): {output_excerpt}"
             )
 
@@ -152,24 +209,20 @@ class OutputChecker:
         if isinstance(patterns, str):
             patterns = [patterns]
 
-        text = ""
-        if where in ("out", "both"):
-            text += self.out or ""
-        if where in ("err", "both"):
-            text += self.err or ""
+        text = self._text(where)
 
         for pattern in patterns:
             if exact and pattern in text:
                 pytest.fail(
                     f"Pattern '{pattern}' should NOT be in {where}, but was found."
                 )
-            elif regex and re.search(pattern, text):
+            elif regex and _compile(pattern).search(text):
                 pytest.fail(
                     f"Pattern /{pattern}/ should NOT be in {where}, but was found."
                 )
             elif not exact and not regex:
-                if any(c in pattern for c in ".*+?()[]{}|^$"):
-                    if re.search(pattern, text):
+                if not _REGEX_META.isdisjoint(pattern):
+                    if _compile(pattern).search(text):
                         pytest.fail(
                             f"Pattern /{pattern}/ should NOT be in {where}, but was found."
                         )
@@ -0,0 +1,166 @@
+import os
+import shutil
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import pytest
+
+from filemate.core.change_extension import ChangeExtConfig
+from filemate.core.rename import RenameConfig
+from filemate.utils.create_test_helpers import create_test_files
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """Keep tmp_path on a RAM-backed filesystem where one is available.
+
+    The suite is dominated by small file creates and renames; pointing
+    basetemp at tmpfs swaps block-device writes for page-cache-only ones.
+    An explicit --basetemp on the command line still wins.
+    """
+    if config.option.basetemp is None and os.path.isdir("/dev/shm"):
+        config.option.basetemp = Path(f"/dev/shm/filemate-tests-{os.getpid()}")
+        # Remember that this run owns the root so sessionfinish can
+        # remove it; a user-supplied --basetemp is left alone.
+        config._filemate_basetemp = config.option.basetemp
+
+
+def pytest_sessionfinish(session: pytest.Session, exitstatus: int) -> None:
+    """Remove the tmpfs basetemp this run created.
+
+    pytest only clears an explicit basetemp at startup, and the pid-unique
+    root above is never reused, so without this every run would leave a
+    RAM-backed tree behind until reboot.
+    """
+    basetemp = getattr(session.config, "_filemate_basetemp", None)
+    if basetemp is not None:
+        shutil.rmtree(basetemp, ignore_errors=True)
+
+
+@pytest.fixture
+def make_config(tmp_path: Path) -> Callable[..., ChangeExtConfig]:
+    """
+    Factory for ChangeExtConfig rooted at the test's tmp_path.
+
+    Centralizes the folder= plumbing that every change-extension test
+    repeats; pass folder= explicitly to point elsewhere. Validation-focused
+    tests should keep the raw constructor so the field under test stays
+    visible at the call site.
+    """
+
+    def _make(**kwargs: object) -> ChangeExtConfig:
+        kwargs.setdefault("folder", tmp_path)
+        return ChangeExtConfig(**kwargs)
+
+    return _make
+
+
+@pytest.fixture
+def make_rename_config(tmp_path: Path) -> Callable[..., RenameConfig]:
+    """
+    Factory for RenameConfig rooted at the test's tmp_path.
+
+    Counterpart of make_config for the rename suite; pass folder= to
+    target a subdirectory. Validation-focused tests should keep the raw
+    constructor.
+    """
+
+    def _make(**kwargs: object) -> RenameConfig:
+        kwargs.setdefault("folder", tmp_path)
+        return RenameConfig(**kwargs)
+
+    return _make
+
+
+@pytest.fixture
+def fast_tmp(tmp_path_factory: pytest.TempPathFactory) -> Iterator[Path]:
+    """
+    A throwaway directory without tmp_path's retention bookkeeping.
+
+    tmp_path keeps the last few test runs around and rotates them, which
+    costs extra metadata work per test. Tests that only need an empty dir
+    for the duration of the test can take this instead: one mktemp up
+    front, one rmdir on the way out (rmtree only if the test left files
+    behind).
+    """
+    d = tmp_path_factory.mktemp("t")
+    yield d
+    try:
+        os.rmdir(d)  # cheap path: the test left the dir empty
+    except OSError:
+        shutil.rmtree(d, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def link_conflict(
+    tmp_path_factory: pytest.TempPathFactory,
+) -> Callable[[Path, str], Path]:
+    """
+    Session-scoped factory that plants a conflict file by hardlinking.
+
+    Each distinct content string is written once into a template; planting
+    the conflict is then a single link(2) — a directory-entry insert with
+    no page-cache write — instead of open/write/close per test. Content is
+    preserved, so read_text() checks against the conflict still hold.
+    """
+    template_root = tmp_path_factory.mktemp("conflict_templates")
+    templates: Dict[str, Path] = {}
+
+    def _link(dest: Path, content: str) -> Path:
+        src = templates.get(content)
+        if src is None:
+            src = template_root / f"conflict_{len(templates)}"
+            src.write_text(content)
+            templates[content] = src
+        try:
+            os.link(src, dest)
+        except OSError:
+            shutil.copy2(src, dest)
+        return dest
+
+    return _link
+
+
+@pytest.fixture(scope="session")
+def clone_files(
+    tmp_path_factory: pytest.TempPathFactory,
+) -> Callable[..., List[Path]]:
+    """
+    Session-scoped factory that clones pre-built test files into a directory.
+
+    Each distinct (count, ext, base_name) layout is created once per session
+    and then hardlinked into the requesting test's tmp_path, so repeated
+    setups cost one link(2) per file instead of open/write/close. Falls back
+    to a copy where hardlinks are unsupported (e.g. cross-device tmp roots).
+
+    Safe under pytest-xdist (`pytest -n auto`): tmp_path_factory is
+    per-worker there, so each worker builds its own template set once and
+    no state is shared between processes.
+    """
+    template_root = tmp_path_factory.mktemp("file_templates")
+    templates: Dict[Tuple[int, str, str], Path] = {}
+
+    def _clone(
+        dest: Path,
+        count: int,
+        ext: str = ".txt",
+        base_name: str = "sample",
+    ) -> List[Path]:
+        key = (count, ext, base_name)
+        template = templates.get(key)
+        if template is None:
+            template = template_root / f"{base_name}_{count}{ext}".replace(".", "_")
+            template.mkdir()
+            create_test_files(template, count, ext=ext, base_name=base_name)
+            templates[key] = template
+
+        cloned = []
+        for src in sorted(template.iterdir()):
+            dst = dest / src.name
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+            cloned.append(dst)
+        return cloned
+
+    return _clone
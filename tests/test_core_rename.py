@@ -1,92 +1,97 @@
+import os
 import pytest
 import sys  # For skipping symlink test on windows
-import unittest
 from pathlib import Path
-from unittest.mock import patch, MagicMock  # Import patch for better permission test
 
-from filemate.core.rename import rename_files, RenameConfig
-from filemate.utils.create_test_helpers import create_test_files
+from filemate.core.rename import rename_files, RenameConfig, EVENT_LOG
+from typing import Callable, List
+
+from filemate.utils.create_test_helpers import bulk_touch, snapshot
 from filemate.utils.test_output_checker import OutputChecker
 
+CloneFiles = Callable[..., List[Path]]
+LinkConflict = Callable[[Path, str], Path]
+MakeRenameConfig = Callable[..., RenameConfig]
+
 
 # === Test Cases ===
 
 
 @pytest.mark.rename
-def test_basic_rename(tmp_path: Path) -> None:
+def test_basic_rename(tmp_path: Path, clone_files: CloneFiles, make_rename_config: MakeRenameConfig) -> None:
     # Setup: Create 3 test files
-    create_test_files(tmp_path, 3)
-    config = RenameConfig(folder=tmp_path, pattern="renamed_{i}")
+    clone_files(tmp_path, 3)
+    config = make_rename_config(pattern="renamed_{i}")
 
     # Action: Rename files
     count = rename_files(config, yes=True)
 
-    # Assert: Check count and existence of renamed files
-    renamed = list(tmp_path.glob("renamed_*.txt"))
+    # Assert: Check count and existence of renamed files (one scandir pass)
+    names = set(snapshot(tmp_path))
     assert count == 3
-    assert len(renamed) == 3
-    for f in renamed:
-        assert f.exists()
-    assert all(
-        f.name in ["renamed_1.txt", "renamed_2.txt", "renamed_3.txt"] for f in renamed
-    )
+    assert names == {"renamed_1.txt", "renamed_2.txt", "renamed_3.txt"}
+    # Structured event records avoid scanning the rendered output
+    assert ("renamed", "sample_0.txt", "renamed_1.txt") in EVENT_LOG
+    assert len(EVENT_LOG) == 3
 
 
 @pytest.mark.rename
-def test_rename_with_extension_filter(tmp_path: Path) -> None:
+def test_rename_with_extension_filter(tmp_path: Path, clone_files: CloneFiles, make_rename_config: MakeRenameConfig) -> None:
     # Setup: Create files with different extensions
-    create_test_files(tmp_path, 2, ext=".txt")
-    create_test_files(tmp_path, 2, ext=".jpg")
-    config = RenameConfig(folder=tmp_path, pattern="filtered_{i}", extensions=[".jpg"])
+    clone_files(tmp_path, 2, ext=".txt")
+    clone_files(tmp_path, 2, ext=".jpg")
+    config = make_rename_config(pattern="filtered_{i}", extensions=[".jpg"])
 
     # Action: Rename only .jpg files
     count = rename_files(config, yes=True)
 
     # Assert: Check count and that only .jpg files were renamed
-    jpg_files = list(tmp_path.glob("filtered_*.jpg"))
-    txt_files = list(tmp_path.glob("sample_*.txt"))  # Original .txt files should remain
+    names = set(snapshot(tmp_path))
     assert count == 2
-    assert len(jpg_files) == 2
-    assert all(f.suffix == ".jpg" for f in jpg_files)
-    assert len(txt_files) == 2  # Ensure txt files were not renamed
+    assert sum(n.startswith("filtered_") and n.endswith(".jpg") for n in names) == 2
+    # Original .txt files should remain untouched
+    assert sum(n.startswith("sample_") and n.endswith(".txt") for n in names) == 2
 
 
 @pytest.mark.rename
-def test_rename_with_start_index(tmp_path: Path) -> None:
+def test_rename_with_start_index(tmp_path: Path, clone_files: CloneFiles, make_rename_config: MakeRenameConfig) -> None:
     # Setup: Create test files
-    create_test_files(tmp_path, 2)
-    config = RenameConfig(folder=tmp_path, pattern="file_{i}", start=10)
+    clone_files(tmp_path, 2)
+    config = make_rename_config(pattern="file_{i}", start=10)
 
     # Action: Rename with custom start index
     count = rename_files(config, yes=True)
 
-    # Assert: Check count and expected filenames
-    expected_names = ["file_10.txt", "file_11.txt"]
-    actual_names = sorted([f.name for f in tmp_path.glob("file_*.txt")])
+    # Assert: Check count and expected filenames (set equality makes the
+    # glob + sort unnecessary — one scandir pass, no Path objects)
     assert count == 2
-    assert actual_names == expected_names
+    assert {
+        e.name
+        for e in os.scandir(tmp_path)
+        if e.name.startswith("file_") and e.name.endswith(".txt")
+    } == {"file_10.txt", "file_11.txt"}
 
 
 @pytest.mark.rename
-def test_rename_to_output_dir(tmp_path: Path) -> None:
+def test_rename_to_output_dir(tmp_path: Path, clone_files: CloneFiles, make_rename_config: MakeRenameConfig) -> None:
     # Setup: Create input and output directories, add files to input
     input_dir = tmp_path / "input"
     output_dir = tmp_path / "output"
     input_dir.mkdir()
     # output_dir is intentionally not created here to test creation
-    create_test_files(input_dir, 2)
+    clone_files(input_dir, 2)
 
-    config = RenameConfig(folder=input_dir, pattern="moved_{i}", output_dir=output_dir)
+    config = make_rename_config(folder=input_dir, pattern="moved_{i}", output_dir=output_dir)
 
     # Action: Rename files into the output directory
     count = rename_files(config, yes=True)
 
     # Assert: Check count, output dir creation, and files in output dir
     assert count == 2
-    assert output_dir.exists()  # Check if output dir was created
-    assert not list(input_dir.iterdir())  # Input directory should be empty
-    assert len(list(output_dir.iterdir())) == 2
-    assert all(f.name.startswith("moved_") for f in output_dir.iterdir())
+    assert not snapshot(input_dir)  # Input directory should be empty
+    out_names = set(snapshot(output_dir))  # Also proves output_dir was created
+    assert len(out_names) == 2
+    assert all(n.startswith("moved_") for n in out_names)
 
 
 @pytest.mark.rename
@@ -100,19 +105,21 @@ def test_rename_fails_on_invalid_dir(tmp_path: Path) -> None:
 
 
 @pytest.mark.rename
-def test_rename_handles_filename_conflict(tmp_path: Path) -> None:
+def test_rename_handles_filename_conflict(
+    tmp_path: Path, clone_files: CloneFiles,
+    make_rename_config: MakeRenameConfig,
+    link_conflict: LinkConflict,
+) -> None:
     # Setup: Create input/output dirs, create a conflict file in output
     input_dir = tmp_path / "input"
     input_dir.mkdir()
     output_dir = tmp_path / "output"
     output_dir.mkdir()
-    (output_dir / "file_1.txt").write_text(
-        "already exists"
-    )  # Conflict is file_1.txt now
-    create_test_files(input_dir, 1)  # creates sample_0.txt
+    link_conflict(output_dir / "file_1.txt", "already exists")  # Conflict is file_1.txt now
+    clone_files(input_dir, 1)  # creates sample_0.txt
 
     # Action: Rename with a pattern that will initially conflict
-    config = RenameConfig(
+    config = make_rename_config(
         folder=input_dir, pattern="file_{i}", output_dir=output_dir, start=1
     )
     renamed_count = rename_files(config, yes=True)
@@ -126,19 +133,21 @@ def test_rename_handles_filename_conflict(tmp_path: Path) -> None:
 
 
 @pytest.mark.rename
-def test_rename_conflict_renames_with_increment(tmp_path: Path) -> None:
+def test_rename_conflict_renames_with_increment(
+    tmp_path: Path, clone_files: CloneFiles,
+    make_rename_config: MakeRenameConfig,
+    link_conflict: LinkConflict,
+) -> None:
     # Setup: Similar to above, ensure conflict resolution works
     input_dir = tmp_path / "in"
     input_dir.mkdir()
     output_dir = tmp_path / "out"
     output_dir.mkdir()
-    (output_dir / "file_1.txt").write_text(
-        "existing"
-    )  # start=1 default, so conflict is file_1.txt
-    create_test_files(input_dir, 1)  # creates sample_0.txt
+    link_conflict(output_dir / "file_1.txt", "existing")  # start=1 default, so conflict is file_1.txt
+    clone_files(input_dir, 1)  # creates sample_0.txt
 
     # Action: Rename
-    config = RenameConfig(
+    config = make_rename_config(
         folder=input_dir, pattern="file_{i}", output_dir=output_dir
     )  # Default start=1
     renamed_count = rename_files(config, yes=True)
@@ -155,28 +164,35 @@ def test_rename_conflict_renames_with_increment(tmp_path: Path) -> None:
 # === New Tests ===
 
 
-# Use mocking for a more reliable permission error test
-@patch(
-    "pathlib.Path.rename",
-    side_effect=PermissionError("Test permission denied, file cannot be renamed!"),
-)
+# Use a monkeypatched fake for a more reliable permission error test
+# (in-place renames go through os.rename since the core switched off pathlib)
 @pytest.mark.rename
 def test_rename_with_permission_error(
-    mock_rename: unittest.mock.MagicMock, tmp_path: Path, capsys: MagicMock
+    tmp_path: Path, capsys: pytest.CaptureFixture[str],
+    clone_files: CloneFiles, monkeypatch: pytest.MonkeyPatch,
+    make_rename_config: MakeRenameConfig,
 ) -> None:
     """
     Test renaming skips file and returns count 0 when PermissionError occurs.
-    Uses mocking to reliably simulate the error.
+    Uses a patched os.rename to reliably simulate the error.
     """
     # Setup: Create a directory and a file within it
     input_dir = tmp_path / "input"
     input_dir.mkdir()
-    file_path = create_test_files(input_dir, 1)[0]  # Creates sample_0.txt
+    file_path = clone_files(input_dir, 1)[0]  # Creates sample_0.txt
+
+    rename_calls: List[tuple] = []
+
+    def deny_rename(*args: object, **kwargs: object) -> None:
+        rename_calls.append(args)
+        raise PermissionError("Test permission denied, file cannot be renamed!")
+
+    monkeypatch.setattr("filemate.core.rename.os.rename", deny_rename)
 
     # Configure renaming
-    config = RenameConfig(folder=input_dir, pattern="file_{i}")
+    config = make_rename_config(folder=input_dir, pattern="file_{i}")
 
-    # Action: Try renaming files (mocked rename will raise PermissionError)
+    # Action: Try renaming files (patched rename will raise PermissionError)
     renamed_count = rename_files(config, yes=True)
 
     # Use OutputChecker instead of raw capsys
@@ -184,7 +200,7 @@ def test_rename_with_permission_error(
 
     # Assert: Check that no files were counted as renamed and the original file still exists
     assert renamed_count == 0
-    assert mock_rename.called  # Ensure our mock was actually triggered
+    assert rename_calls  # Ensure our fake was actually triggered
     assert file_path.exists()  # The original file should still be there
     assert not (input_dir / "file_1.txt").exists()  # The target rename should not exist
 
@@ -200,7 +216,11 @@ def test_rename_with_permission_error(
 
 
 @pytest.mark.rename
-def test_rename_with_file_existence_error(tmp_path: Path, capsys: MagicMock) -> None:
+def test_rename_with_file_existence_error(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], clone_files: CloneFiles,
+    make_rename_config: MakeRenameConfig,
+    link_conflict: LinkConflict,
+) -> None:
     """
     Test renaming correctly skips over a pre-existing file and renames to the next index.
     """
@@ -212,11 +232,11 @@ def test_rename_with_file_existence_error(tmp_path: Path, capsys: MagicMock) ->
     conflict_file_path = (
         output_dir / "file_1.txt"
     )  # Default start=1 conflicts with file_1.txt
-    conflict_file_path.write_text("existing file")
-    original_input_file = create_test_files(input_dir, 1)[0]  # sample_0.txt
+    link_conflict(conflict_file_path, "existing file")
+    original_input_file = clone_files(input_dir, 1)[0]  # sample_0.txt
 
     # Action: Rename files
-    config = RenameConfig(
+    config = make_rename_config(
         folder=input_dir, pattern="file_{i}", output_dir=output_dir
     )  # Default start=1
     renamed_count = rename_files(config, yes=True)
@@ -244,7 +264,10 @@ def test_rename_with_file_existence_error(tmp_path: Path, capsys: MagicMock) ->
 
 
 @pytest.mark.rename
-def test_rename_with_max_attempts(tmp_path: Path, capsys: MagicMock) -> None:
+def test_rename_with_max_attempts(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], clone_files: CloneFiles,
+    make_rename_config: MakeRenameConfig,
+) -> None:
     """
     Test renaming correctly finds the next available index when multiple conflicts exist.
     """
@@ -253,17 +276,14 @@ def test_rename_with_max_attempts(tmp_path: Path, capsys: MagicMock) -> None:
     input_dir.mkdir()
     output_dir = tmp_path / "output"
     output_dir.mkdir()
-    # Simulate conflicts for file_1.txt, file_2.txt, file_3.txt (assuming start=1)
-    for i in range(
-        1, 12
-    ):  # Create conflicts for indices 1 through 11 (more than MAX_RENAME_ATTEMPTS=10)
-        (output_dir / f"file_{i}.txt").write_text(f"existing file {i}")
-    # for i in range(1, 4):  # Create conflicts for indices 1, 2, 3
-    #     (output_dir / f"file_{i}.txt").write_text(f"existing file {i}")
-    create_test_files(input_dir, 1)  # creates sample_0.txt
+    # Create conflicts for indices 1 through 11 (more than
+    # MAX_RENAME_ATTEMPTS=10); their content is never read, so empty
+    # touched files are enough
+    bulk_touch(output_dir, (f"file_{i}.txt" for i in range(1, 12)))
+    clone_files(input_dir, 1)  # creates sample_0.txt
 
     # Action: Rename files
-    config = RenameConfig(
+    config = make_rename_config(
         folder=input_dir, pattern="file_{i}", output_dir=output_dir
     )  # Default start=1
     renamed_count = rename_files(config, yes=True)
@@ -272,8 +292,9 @@ def test_rename_with_max_attempts(tmp_path: Path, capsys: MagicMock) -> None:
     output = OutputChecker(capsys)
 
     assert renamed_count == 0  # Should skip after max attempts
-    assert not (output_dir / "file_12.txt").exists()  # Check beyond max attempts
-    assert (output_dir / "file_1.txt").exists()  # Originals exist
+    out_names = set(snapshot(output_dir))
+    assert "file_12.txt" not in out_names  # Check beyond max attempts
+    assert "file_1.txt" in out_names  # Originals exist
     assert (input_dir / "sample_0.txt").exists()  # Original source exists
 
     # Use assert_contains for more reliable assertions
@@ -281,17 +302,20 @@ def test_rename_with_max_attempts(tmp_path: Path, capsys: MagicMock) -> None:
 
 
 @pytest.mark.rename
-def test_rename_dry_run(tmp_path: Path, capsys: MagicMock) -> None:
+def test_rename_dry_run(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], clone_files: CloneFiles,
+    make_rename_config: MakeRenameConfig,
+) -> None:
     """
     Test the dry-run feature ensures no actual renaming occurs.
     """
     # Setup: Create input directory and files
     input_dir = tmp_path / "input"
     input_dir.mkdir()
-    original_files = create_test_files(input_dir, 2)  # sample_0.txt, sample_1.txt
+    original_files = clone_files(input_dir, 2)  # sample_0.txt, sample_1.txt
 
     # Action: Perform dry run
-    config = RenameConfig(folder=input_dir, pattern="file_{i}")
+    config = make_rename_config(folder=input_dir, pattern="file_{i}")
 
     # Action: Perform dry run (yes=True is irrelevant for dry run confirmation)
     preview_count = rename_files(config, dry_run=True, yes=True)
@@ -301,11 +325,10 @@ def test_rename_dry_run(tmp_path: Path, capsys: MagicMock) -> None:
 
     # Assert: Check count returned is preview count and files remain unchanged
     assert preview_count == 2  # Function should return previewed count in dry_run
-    assert all(f.exists() for f in original_files)  # Original files still exist
-    assert all(
-        f.name.startswith("sample_") for f in input_dir.iterdir()
-    )  # Names unchanged
-    assert not list(input_dir.glob("file_*.txt"))  # No files with the new pattern exist
+    names = set(snapshot(input_dir))
+    assert names == {f.name for f in original_files}  # Original files still exist
+    assert all(n.startswith("sample_") for n in names)  # Names unchanged
+    assert not any(n.startswith("file_") for n in names)  # No new-pattern files exist
 
     # Add assertions for console output
     output.assert_contains(
@@ -319,21 +342,23 @@ def test_rename_dry_run(tmp_path: Path, capsys: MagicMock) -> None:
 
 
 @pytest.mark.rename
-def test_rename_invalid_start_index(tmp_path: Path) -> None:
+def test_rename_invalid_start_index(fast_tmp: Path) -> None:
     """
     Test configuration raises ValueError for start index less than 1.
     """
     # Action & Assert: Check ValueError on config initialization
-    with pytest.raises(
-        ValueError, match="Start index must be greater than or equal to 1"
-    ):
+    # start uses a Field(ge=1) constraint; match pydantic-core's wording
+    with pytest.raises(ValueError, match="greater than or equal to 1"):
         RenameConfig(
-            folder=tmp_path, pattern="file_{i}", start=0
-        )  # Use tmp_path directly, must exist
+            folder=fast_tmp, pattern="file_{i}", start=0
+        )  # Use fast_tmp directly, must exist
 
 
 @pytest.mark.rename
-def test_rename_output_dir_creation(tmp_path: Path, capsys: MagicMock) -> None:
+def test_rename_output_dir_creation(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], clone_files: CloneFiles,
+    make_rename_config: MakeRenameConfig,
+) -> None:
     """
     Test that the output directory is automatically created if it doesn't exist.
     """
@@ -341,10 +366,10 @@ def test_rename_output_dir_creation(tmp_path: Path, capsys: MagicMock) -> None:
     input_dir = tmp_path / "input"
     input_dir.mkdir()
     output_dir = tmp_path / "output"  # Does not exist yet
-    create_test_files(input_dir, 2)
+    clone_files(input_dir, 2)
 
     # Action: Rename files, specifying the non-existent output directory
-    config = RenameConfig(folder=input_dir, pattern="file_{i}", output_dir=output_dir)
+    config = make_rename_config(folder=input_dir, pattern="file_{i}", output_dir=output_dir)
     renamed_count = rename_files(config, yes=True)
 
     # Use OutputChecker
@@ -352,10 +377,8 @@ def test_rename_output_dir_creation(tmp_path: Path, capsys: MagicMock) -> None:
 
     # Assert: Check count, existence of output dir, and renamed files within it
     assert renamed_count == 2
-    assert output_dir.exists()  # Output directory should have been created
-    assert output_dir.is_dir()
-    assert len(list(output_dir.iterdir())) == 2
-    assert all(f.name in ["file_1.txt", "file_2.txt"] for f in output_dir.iterdir())
+    assert output_dir.is_dir()  # Output directory should have been created
+    assert set(snapshot(output_dir)) == {"file_1.txt", "file_2.txt"}
 
     # Add assertions for console output
     output.assert_contains(
@@ -369,19 +392,22 @@ def test_rename_output_dir_creation(tmp_path: Path, capsys: MagicMock) -> None:
 
 
 @pytest.mark.rename
-def test_rename_without_extension_filter(tmp_path: Path, capsys: MagicMock) -> None:
+def test_rename_without_extension_filter(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], clone_files: CloneFiles,
+    make_rename_config: MakeRenameConfig,
+) -> None:
     """
     Test renaming works correctly when no extension filter is provided.
     """
     # Setup: Create files with the same extension
     input_dir = tmp_path / "input"
     input_dir.mkdir()
-    create_test_files(
+    clone_files(
         input_dir, 3, ext=".log"
     )  # sample_0.log, sample_1.log, sample_2.log
 
     # Action: Rename without specifying extensions
-    config = RenameConfig(folder=input_dir, pattern="log_{i}")
+    config = make_rename_config(folder=input_dir, pattern="log_{i}")
     renamed_count = rename_files(config, yes=True)
 
     # Use OutputChecker
@@ -389,9 +415,7 @@ def test_rename_without_extension_filter(tmp_path: Path, capsys: MagicMock) -> N
 
     # Assert: Check count and that all files were renamed
     assert renamed_count == 3
-    renamed_files = list(input_dir.glob("log_*.log"))
-    assert len(renamed_files) == 3
-    assert all(f.name in ["log_1.log", "log_2.log", "log_3.log"] for f in renamed_files)
+    assert set(snapshot(input_dir)) == {"log_1.log", "log_2.log", "log_3.log"}
 
     # Add assertions for console output
     output.assert_contains(
@@ -409,158 +433,133 @@ def test_rename_without_extension_filter(tmp_path: Path, capsys: MagicMock) -> N
 
 
 @pytest.mark.rename
-@patch("filemate.core.rename.click.confirm")
-def test_rename_confirm_prompt_yes_input(
-    mock_confirm: MagicMock, tmp_path: Path, capsys: MagicMock
+@pytest.mark.parametrize(
+    "yes,confirmed,expected_count",
+    [
+        pytest.param(False, True, 1, id="prompt-yes"),
+        pytest.param(False, False, 0, id="prompt-no"),
+        pytest.param(True, None, 1, id="yes-flag"),
+    ],
+)
+def test_rename_confirm_matrix(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str],
+    clone_files: CloneFiles, monkeypatch: pytest.MonkeyPatch,
+    make_rename_config: MakeRenameConfig,
+    yes: bool, confirmed: bool, expected_count: int,
 ) -> None:
-    """Test confirmation prompt proceeds if user inputs yes."""
-    create_test_files(tmp_path, 1)  # sample_0.txt
-    mock_confirm.return_value = True  # Simulate user confirming
-    config = RenameConfig(folder=tmp_path, pattern="new_{i}")
-
-    # Action: Call WITHOUT yes=True to trigger prompt
-    count = rename_files(config, yes=False)
+    """One body for the prompt-yes / prompt-no / yes-flag combinations."""
+    clone_files(tmp_path, 1)  # sample_0.txt
+    confirm_calls: List[tuple] = []
+    if not yes:
+        # The core imports rich_click lazily inside the prompt branch, so
+        # patch the source module rather than a (now absent) module alias
+        monkeypatch.setattr(
+            "rich_click.confirm",
+            lambda *a, **kw: confirm_calls.append(a) or confirmed,
+        )
+    config = make_rename_config(pattern="new_{i}")
+
+    count = rename_files(config, yes=yes)
 
     # Use OutputChecker
     output = OutputChecker(capsys)
 
-    # Assert
-    mock_confirm.assert_called_once()  # Check prompt was shown
-    assert count == 1
-    assert (tmp_path / "new_1.txt").exists()
-    assert not (tmp_path / "sample_0.txt").exists()
-
-    # Add assertions for console output
-    output.assert_contains(
-        [
-            "Proposed Changes",
-            "sample_0.txt → new_1.txt",
-            "Renamed:",
-            "Files renamed successfully: 1",
-        ]
-    )
+    assert count == expected_count
+    assert len(confirm_calls) == (0 if yes else 1)
+    names = set(snapshot(tmp_path))
+    if expected_count:
+        assert "new_1.txt" in names
+        assert "sample_0.txt" not in names
+    else:
+        assert "new_1.txt" not in names
+        assert "sample_0.txt" in names  # Original exists
+
+    # Output differs per combination: the preview table only appears when
+    # the prompt runs, the cancel message only on a declined prompt
+    if yes:
+        output.assert_contains(
+            ["Renamed:", "sample_0.txt → new_1.txt", "Files renamed successfully: 1"]
+        )
+        output.assert_not_contains(["Proposed Changes", "Proceed with renaming?"])
+    elif confirmed:
+        output.assert_contains(
+            [
+                "Proposed Changes",
+                "sample_0.txt → new_1.txt",
+                "Renamed:",
+                "Files renamed successfully: 1",
+            ]
+        )
+    else:
+        output.assert_contains(
+            [
+                "Proposed Changes",
+                "sample_0.txt → new_1.txt",
+                "Operation cancelled by user",
+            ]
+        )
 
 
 @pytest.mark.rename
-@patch("filemate.core.rename.click.confirm")
-def test_rename_confirm_prompt_no_input(
-    mock_confirm: MagicMock, tmp_path: Path, capsys: MagicMock
+@pytest.mark.parametrize(
+    "force,expected_count",
+    [
+        pytest.param(True, 1, id="force"),
+        pytest.param(False, 0, id="no-force"),
+    ],
+)
+def test_rename_force_conflict_matrix(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], clone_files: CloneFiles,
+    make_rename_config: MakeRenameConfig,
+    link_conflict: LinkConflict,
+    force: bool, expected_count: int,
 ) -> None:
-    """Test confirmation prompt cancels if user inputs no."""
-    create_test_files(tmp_path, 1)
-    mock_confirm.return_value = False  # Simulate user cancelling
-    config = RenameConfig(folder=tmp_path, pattern="new_{i}")
-
-    # Action: Call WITHOUT yes=True
-    count = rename_files(config, yes=False)  # Explicitly yes=False
-
-    # Use OutputChecker
-    output = OutputChecker(capsys)
-
-    # Assert
-    mock_confirm.assert_called_once()  # Check prompt was shown
-    assert count == 0  # Should return 0 when cancelled
-    assert not (tmp_path / "new_1.txt").exists()
-    assert (tmp_path / "sample_0.txt").exists()  # Original exists
-
-    # Add assertions for console output
-    output.assert_contains(
-        ["Proposed Changes", "sample_0.txt → new_1.txt", "Operation cancelled by user"]
+    """force=True overwrites the existing target; force=False skips it."""
+    clone_files(tmp_path, 1, base_name="source", ext=".dat")  # source_0.dat
+    link_conflict(tmp_path / "target_1.dat", "pre-existing data")  # Conflict file
+    if not force:
+        # Occupy every name conflict resolution may try so the skip path
+        # actually runs instead of renaming to the next free index
+        bulk_touch(tmp_path, (f"target_{i}.dat" for i in range(2, 12)))
+
+    # Prefix filter keeps the seeded target files out of the candidate set;
+    # only source_0.dat is processed
+    config = make_rename_config(
+        pattern="target_{i}", start=1, extensions=[".dat"], source_prefix="source"
     )
-
-
-@pytest.mark.rename
-def test_rename_yes_flag_skips_prompt(tmp_path: Path, capsys: MagicMock) -> None:
-    """Test that yes=True flag bypasses the confirmation prompt."""
-    create_test_files(tmp_path, 1)
-    config = RenameConfig(folder=tmp_path, pattern="new_{i}")
-
-    # Action: Call WITH yes=True
-    # We don't need to mock click.confirm, as it shouldn't be called
-    count = rename_files(config, yes=True)
+    count = rename_files(config, yes=True, force=force)
 
     # Use OutputChecker
     output = OutputChecker(capsys)
 
-    # Assert
-    assert count == 1
-    assert (tmp_path / "new_1.txt").exists()
-
-    # Add assertions for console output - should NOT contain proposed changes
-    output.assert_contains(
-        ["Renamed:", "sample_0.txt → new_1.txt", "Files renamed successfully: 1"]
-    )
-    # Assert that confirmation prompt was skipped
-    output.assert_not_contains(["Proposed Changes", "Proceed with renaming?"])
-
-
-@pytest.mark.rename
-def test_rename_force_overwrite_conflict(tmp_path: Path, capsys: MagicMock) -> None:
-    """Test force=True overwrites an existing target file."""
-    create_test_files(tmp_path, 1, base_name="source", ext=".dat")  # source_0.dat
-    (tmp_path / "target_1.dat").write_text("pre-existing data")  # Conflict file
-
-    # Apply extension filter to only process the source file
-    config = RenameConfig(
-        folder=tmp_path, pattern="target_{i}", start=1, extensions=[".dat"]
-    )
-    # Action: Call with force=True and yes=True
-    count = rename_files(config, yes=True, force=True)
-
-    # Use OutputChecker
-    output = OutputChecker(capsys)
-
-    # Assert
-    assert count == 1  # Only the .dat file should be processed and counted
-    assert not (tmp_path / "source_0.dat").exists()  # Original renamed
-    assert (tmp_path / "target_1.dat").exists()  # Conflict file now overwritten
-    assert (
-        tmp_path / "target_1.dat"
-    ).read_text() != "pre-existing data"  # Check content changed
-
-    # Add assertions for console output
-    output.assert_contains(
-        [
-            "--force specified: Overwriting existing file",
-            "target_1.dat",
-            "Renamed:",
-            "source_0.dat → target_1.dat",
-            "Files renamed successfully: 1",
-        ]
-    )
-
-
-@pytest.mark.rename
-def test_rename_no_force_skips_conflict(tmp_path: Path, capsys: MagicMock) -> None:
-    """Test force=False (default) skips overwriting an existing target file."""
-    create_test_files(tmp_path, 1, base_name="source", ext=".dat")  # source_0.dat
-    (tmp_path / "target_1.dat").write_text("pre-existing data")  # Conflict file
-
-    # Apply extension filter to only process the source file
-    config = RenameConfig(
-        folder=tmp_path, pattern="target_{i}", start=1, extensions=[".dat"]
-    )
-    # Action: Call with force=False (default) and yes=True
-    count = rename_files(config, yes=True, force=False)
-
-    # Use OutputChecker
-    output = OutputChecker(capsys)
-
-    # Assert
-    assert count == 0  # File should be skipped due to conflict
-    assert (tmp_path / "source_0.dat").exists()  # Original exists
-    assert (
-        tmp_path / "target_1.dat"
-    ).read_text() == "pre-existing data"  # Conflict unchanged
-
-    # Add assertions for console output
-    output.assert_contains(
-        [
-            "Error: Could not rename source_0.dat",
-            "Files renamed successfully: 0",
-            "Files skipped (due to naming conflicts): 1",
-        ]
-    )
+    assert count == expected_count
+    names = set(snapshot(tmp_path))
+    assert "target_1.dat" in names
+    conflict_text = (tmp_path / "target_1.dat").read_text()
+    if force:
+        assert "source_0.dat" not in names  # Original renamed
+        assert conflict_text != "pre-existing data"  # Content changed
+        output.assert_contains(
+            [
+                "--force specified: Overwriting existing file",
+                "target_1.dat",
+                "Renamed:",
+                "source_0.dat → target_1.dat",
+                "Files renamed successfully: 1",
+            ]
+        )
+    else:
+        assert "source_0.dat" in names  # Original exists
+        assert conflict_text == "pre-existing data"  # Conflict unchanged
+        # exact=True: the parentheses here are literal, not regex groups
+        output.assert_contains(
+            [
+                "Error: Could not rename source_0.dat",
+                "Files renamed successfully: 0",
+                "Files skipped (due to naming conflicts): 1",
+            ],
+            exact=True,
+        )
 
 
 @pytest.mark.skipif(
@@ -568,25 +567,30 @@ def test_rename_no_force_skips_conflict(tmp_path: Path, capsys: MagicMock) -> No
     reason="Symlinks require special permissions or handling on Windows",
 )
 @pytest.mark.rename
-def test_rename_skips_symlinks(tmp_path: Path, capsys: MagicMock) -> None:
+def test_rename_skips_symlinks(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], clone_files: CloneFiles,
+    make_rename_config: MakeRenameConfig,
+) -> None:
     """Test that symbolic links are skipped by default."""
     target = tmp_path / "real_file.txt"
     target.write_text("content")
-    link = tmp_path / "link_to_file.txt"
-    link.symlink_to(target)
-    create_test_files(tmp_path, 1, base_name="another")  # another_0.txt
+    os.symlink(target, tmp_path / "link_to_file.txt")
+    clone_files(tmp_path, 1, base_name="another")  # another_0.txt
 
-    config = RenameConfig(folder=tmp_path, pattern="processed_{i}")
+    config = make_rename_config(pattern="processed_{i}")
     count = rename_files(config, yes=True)
 
     # Use OutputChecker instead of raw capsys
     output = OutputChecker(capsys)
 
     assert count == 2  # Only real_file and another_0 should be renamed
-    assert link.exists() and link.is_symlink()  # Link untouched
-    assert link.name == "link_to_file.txt"
-    assert (tmp_path / "processed_1.txt").exists()  # another_0.txt renamed
-    assert (tmp_path / "processed_2.txt").exists()  # real_file.txt renamed
+    # lstat-level view: Path.exists() follows the link, which dangles once
+    # its target is renamed; the DirEntry answers from the scandir itself
+    entries = snapshot(tmp_path)
+    assert "link_to_file.txt" in entries  # Link untouched
+    assert entries["link_to_file.txt"].is_symlink()
+    assert "processed_1.txt" in entries  # another_0.txt renamed
+    assert "processed_2.txt" in entries  # real_file.txt renamed
 
     # Use assert_contains for more reliable assertions
     output.assert_contains(
@@ -601,11 +605,14 @@ def test_rename_skips_symlinks(tmp_path: Path, capsys: MagicMock) -> None:
 
 
 @pytest.mark.rename
-def test_rename_pattern_padding(tmp_path: Path, capsys: MagicMock) -> None:
+def test_rename_pattern_padding(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], clone_files: CloneFiles,
+    make_rename_config: MakeRenameConfig,
+) -> None:
     """Test rename pattern with zero-padding format specifier."""
-    create_test_files(tmp_path, 3)  # sample_0.txt, sample_1.txt, sample_2.txt
+    clone_files(tmp_path, 3)  # sample_0.txt, sample_1.txt, sample_2.txt
     (tmp_path / "sample_9.txt").write_text("test 9")  # sample_9.txt
-    config = RenameConfig(folder=tmp_path, pattern="img_{i:03d}")  # Pad to 3 digits
+    config = make_rename_config(pattern="img_{i:03d}")  # Pad to 3 digits
 
     # Action: Use yes=True to bypass prompt
     count = rename_files(config, yes=True)
@@ -617,15 +624,15 @@ def test_rename_pattern_padding(tmp_path: Path, capsys: MagicMock) -> None:
     assert count == 4
     # Note: Sorting will likely be 1, 10, 2, 3 if sample_9 exists... adjust expectations or setup
     # Let's assume sample_9 is processed last based on name
-    expected_files = [
+    names = set(snapshot(tmp_path))  # One scandir replaces both globs
+    # Indices 1,2,3,4 assigned
+    assert {n for n in names if n.startswith("img_")} == {
         "img_001.txt",
         "img_002.txt",
         "img_003.txt",
         "img_004.txt",
-    ]  # Indices 1,2,3,4 assigned
-    actual_files = sorted([p.name for p in tmp_path.glob("img_*.txt")])
-    assert actual_files == expected_files
-    assert not list(tmp_path.glob("sample_*.txt"))  # Originals are gone
+    }
+    assert not any(n.startswith("sample_") for n in names)  # Originals are gone
 
     # Add assertions for console output
     output.assert_contains(["Renamed:", "Files renamed successfully: 4"])
@@ -633,12 +640,14 @@ def test_rename_pattern_padding(tmp_path: Path, capsys: MagicMock) -> None:
 
 @pytest.mark.rename
 def test_rename_pattern_padding_with_start_index(
-    tmp_path: Path, capsys: MagicMock
+    tmp_path: Path, capsys: pytest.CaptureFixture[str],
+    clone_files: CloneFiles,
+    make_rename_config: MakeRenameConfig,
 ) -> None:
     """Test rename pattern padding works correctly with a non-default start index."""
-    create_test_files(tmp_path, 2)  # sample_0.txt, sample_1.txt
-    config = RenameConfig(
-        folder=tmp_path, pattern="file_{i:04d}", start=98
+    clone_files(tmp_path, 2)  # sample_0.txt, sample_1.txt
+    config = make_rename_config(
+        pattern="file_{i:04d}", start=98
     )  # Start at 98, pad to 4
 
     # Action: Use yes=True
@@ -649,10 +658,12 @@ def test_rename_pattern_padding_with_start_index(
 
     # Assert
     assert count == 2
-    expected_files = ["file_0098.txt", "file_0099.txt"]
-    actual_files = sorted([p.name for p in tmp_path.glob("file_*.txt")])
-    assert actual_files == expected_files
-    assert not list(tmp_path.glob("sample_*.txt"))
+    names = set(snapshot(tmp_path))
+    assert {n for n in names if n.startswith("file_")} == {
+        "file_0098.txt",
+        "file_0099.txt",
+    }
+    assert not any(n.startswith("sample_") for n in names)
 
     # Add assertions for console output
     output.assert_contains(
@@ -667,12 +678,14 @@ def test_rename_pattern_padding_with_start_index(
 
 @pytest.mark.rename
 def test_rename_pattern_invalid_format_specifier(
-    tmp_path: Path, capsys: MagicMock
+    tmp_path: Path, capsys: pytest.CaptureFixture[str],
+    clone_files: CloneFiles,
+    make_rename_config: MakeRenameConfig,
 ) -> None:
-    """Test that an invalid format specifier in the pattern falls back to default formatting."""
-    create_test_files(tmp_path, 1)  # sample_0.txt
-    # Use an invalid specifier 'x'
-    config = RenameConfig(folder=tmp_path, pattern="img_{i:x}")
+    """Test that an invalid format specifier aborts up front and renames nothing."""
+    clone_files(tmp_path, 1)  # sample_0.txt
+    # 's' is not a valid format code for integers ('x' would be valid hex)
+    config = make_rename_config(pattern="img_{i:s}")
 
     # Action: Use yes=True
     count = rename_files(config, yes=True)
@@ -680,30 +693,33 @@ def test_rename_pattern_invalid_format_specifier(
     # Use OutputChecker
     output = OutputChecker(capsys)
 
-    # Assert
-    assert count == 1  # File is counted
-    # The file is actually being renamed despite the invalid format specifier
-    # The format error is handled internally and a default name is used
-    assert not (tmp_path / "sample_0.txt").exists()  # Original is renamed
-    assert (tmp_path / "img_1.txt").exists()  # Renamed with default formatting
+    # Assert: the up-front pattern probe rejects the whole batch
+    assert count == 0
+    names = set(snapshot(tmp_path))
+    assert "sample_0.txt" in names  # Original untouched
+    assert names == {"sample_0.txt"}  # Nothing was renamed
 
-    # Use assert_contains for more reliable assertions
+    # exact=True: the parentheses here are literal, not regex groups
     output.assert_contains(
         [
             "Error applying pattern",
-            "Unknown format code 'x'",
+            "Unknown format code 's'",
             "Files renamed successfully: 0",
             "Files skipped (due to errors): 1",
-        ]
+        ],
+        exact=True,
     )
 
 
 @pytest.mark.rename
-def test_rename_pattern_with_other_braces(tmp_path: Path, capsys: MagicMock) -> None:
+def test_rename_pattern_with_other_braces(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], clone_files: CloneFiles,
+    make_rename_config: MakeRenameConfig,
+) -> None:
     """Test pattern containing unrelated braces still works with index formatting."""
-    create_test_files(tmp_path, 1)  # sample_0.txt
+    clone_files(tmp_path, 1)  # sample_0.txt
     # Pattern has literal braces {} and formatted index
-    config = RenameConfig(folder=tmp_path, pattern="prefix-{{literal}}-{i:02d}")
+    config = make_rename_config(pattern="prefix-{{literal}}-{i:02d}")
 
     # Action: Use yes=True
     count = rename_files(config, yes=True)